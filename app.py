@@ -1,8 +1,14 @@
 import os
+from functools import partial
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import hopsworks
+
+from dashboard_data import (
+    FORECAST_LOOKBACK_DAYS, METRICS_FG, ROLLUP_FG_VERSION, SnapshotCache, USE_DUCKDB,
+    latest_metrics, latest_run, fetch_concurrently, group_version, read_group, rollup_group_name, station_rows, window_start
+)
 
 # ---------- CONFIG ----------
 st.set_page_config(page_title="Citi Bike Forecast Dashboard", layout="wide")
@@ -71,15 +77,18 @@ STATION_NAME_MAP = {
     "HB103": "14th Street Hoboken"
 }
 
+# "mae" is the model name in the citibike_model_metrics table
 MODELS = {
-    "Lag-28": {"pred": "citibike_predictions_lag28", "forecast": "citibike_forecast_lag28", "mae": "citibike_model_metrics_lag28"},
-    "Top-K":  {"pred": "citibike_predictions_topk",  "forecast": "citibike_forecast_topk",  "mae": "citibike_model_metrics_topk"},
-    "PCA":    {"pred": "citibike_predictions_pca",   "forecast": "citibike_forecast_pca",   "mae": "citibike_model_metrics_pca"}
+    "Lag-28": {"pred": "citibike_predictions_lag28", "forecast": "citibike_forecast_lag28", "mae": "LGBMLag28"},
+    "Top-K":  {"pred": "citibike_predictions_topk",  "forecast": "citibike_forecast_topk",  "mae": "LGBMTopK"},
+    "PCA":    {"pred": "citibike_predictions_pca",   "forecast": "citibike_forecast_pca",   "mae": "LGBMPCA"}
 }
 
 # ---------- HOPSWORKS LOGIN ----------
 @st.cache_resource
 def get_hopsworks_connection():
+    # Imported here so the DuckDB backend runs without the Hopsworks client installed
+    import hopsworks
     project = hopsworks.login(
         project=os.environ["HOPSWORKS_PROJECT_NAME"],
         api_key_value=os.environ["HOPSWORKS_API_KEY"],
@@ -88,11 +97,21 @@ def get_hopsworks_connection():
     return project
 
 # ---------- FEATURE GROUP LOADER ----------
-@st.cache_data(ttl=3600)
+@st.cache_resource
+def get_snapshot_cache():
+    """One per server process: every session is served from snapshots refreshed in the background."""
+    fs = None if USE_DUCKDB else get_hopsworks_connection().get_feature_store()
+    return SnapshotCache(partial(read_group, fs), partial(group_version, fs))
+
 def load_fg(name: str, version: int = 1):
-    project = get_hopsworks_connection()
-    fs = project.get_feature_store()
-    return fs.get_feature_group(name=name, version=version).read()
+    return get_snapshot_cache().get(name, version)
+
+def load_station_fg(name: str, version: int, station: str, since=None):
+    """Only the viewed (group, station, window) slices are read and kept."""
+    return get_snapshot_cache().get(name, version, station, since)
+
+def load_metrics():
+    return latest_metrics(load_fg(METRICS_FG))
 
 # ---------- SIDEBAR ----------
 with st.sidebar:
@@ -128,13 +147,21 @@ st.markdown("</div>", unsafe_allow_html=True)
 
 # ---------- LOAD DATA ----------
 try:
-    df_pred = load_fg(MODELS[model_option]["pred"])
-    df_pred = df_pred[df_pred["station_id"] == station]
-    
-    df_fore = load_fg(MODELS[model_option]["forecast"])
-    df_fore = df_fore[df_fore["station_id"] == station]
+    # Daily / 6-hour rollups are materialized at upload time; only filter them here.
+    # The three reads run concurrently on one shared Hopsworks session.
+    get_snapshot_cache()
+    loaded = dict(fetch_concurrently({
+        "pred": partial(load_station_fg, rollup_group_name(MODELS[model_option]["pred"], "daily"),
+                        ROLLUP_FG_VERSION, station),
+        "fore": partial(load_station_fg, rollup_group_name(MODELS[model_option]["forecast"], "6h"),
+                        ROLLUP_FG_VERSION, station, since=window_start(FORECAST_LOOKBACK_DAYS)),
+        "mae": load_metrics,
+    }))
+    df_pred = station_rows(loaded["pred"], station)
+    df_fore = latest_run(station_rows(loaded["fore"], station))
     
-    df_mae = load_fg(MODELS[model_option]["mae"])
+    df_mae = loaded["mae"]
+    df_mae = df_mae[df_mae["model"] == MODELS[model_option]["mae"]]
     station_mae = df_mae[df_mae["station_id"] == station]["mae"].values[0]
 except Exception as e:
     st.error(f"Error loading data from Hopsworks: {e}")
@@ -144,24 +171,8 @@ except Exception as e:
 if selected_tab == "Historical Predictions":
     st.subheader(f"📊 Historical: {model_option} Model")
     
-    # Ensure hour is datetime and handle missing/non-numeric values
-    if not pd.api.types.is_datetime64_dtype(df_pred["hour"]):
-        df_pred["hour"] = pd.to_datetime(df_pred["hour"], errors='coerce')
-    
-    # Drop rows with NaT values in hour
-    df_pred = df_pred.dropna(subset=["hour"])
-    
-    # Extract date only for daily grouping
-    df_pred["date"] = df_pred["hour"].dt.date
-    
-    # Group by date (more resilient than resample)
-    df_daily = df_pred.groupby("date").agg({
-        "predicted_rides": "mean",
-        "actual_rides": "mean"
-    }).reset_index()
-    
-    # Convert date back to datetime for plotting
-    df_daily["hour"] = pd.to_datetime(df_daily["date"])
+    # Daily averages come pre-aggregated from the <predictions>_daily rollup
+    df_daily = df_pred
     
     # Prepare for plotting
     df_plot = df_daily.copy()
@@ -226,24 +237,8 @@ if selected_tab == "Historical Predictions":
 elif selected_tab == "Future Forecast":
     st.subheader(f"🔮 Forecast: {model_option} Model")
     
-    # Make sure the date is in datetime format
-    if not pd.api.types.is_datetime64_dtype(df_fore["hour"]):
-        df_fore["hour"] = pd.to_datetime(df_fore["hour"], errors='coerce')
-    
-    # Drop rows with invalid datetime
-    df_fore = df_fore.dropna(subset=["hour"])
-
-    # Create 6-hour bins for aggregation
-    df_fore["hour_bin"] = df_fore["hour"].dt.floor("6H")
-    
-    # Group by 6-hour intervals 
-    df_fore_agg = df_fore.groupby("hour_bin").agg({
-        "predicted_rides": "mean",
-        "station_id": "first"  # Keep the station ID
-    }).reset_index()
-    
-    # Rename columns for clarity
-    df_fore_agg = df_fore_agg.rename(columns={"hour_bin": "hour"})
+    # 6-hour means come pre-aggregated from the <forecast>_6h rollup
+    df_fore_agg = df_fore
     
     fig = px.line(
         df_fore_agg,
@@ -293,10 +288,11 @@ elif selected_tab == "Model Summary":
     
     # Get all model metrics for comparison
     all_mae_data = []
+    metrics_df = loaded["mae"]
     for model_name, model_info in MODELS.items():
         # Add try/except blocks to handle potential errors
         try:
-            mae_df = load_fg(model_info["mae"])
+            mae_df = metrics_df[metrics_df["model"] == model_info["mae"]]
             station_data = mae_df[mae_df["station_id"] == station].copy()
             
             # Skip if no data for this station
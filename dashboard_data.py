@@ -0,0 +1,217 @@
+"""
+Feature-group names and frame helpers shared by app.py and monitor_app.py.
+
+Hourly predictions are rolled up at upload time (src/upload/upload_to_hopsworks_inference.py),
+so the dashboards read <group>_daily / <group>_6h slices for one station and
+time window at a time.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from src.utils.prediction_store import ROLLUP_FG_VERSION, rollup_group_name
+
+logger = logging.getLogger(__name__)
+
+METRICS_FG = "citibike_model_metrics"
+
+# DASHBOARD_BACKEND=duckdb serves both dashboards from the local Parquet dataset
+# (src/utils/duckdb_store.py) instead of reading Hopsworks feature groups
+DASHBOARD_BACKEND = os.getenv("DASHBOARD_BACKEND", "hopsworks")
+USE_DUCKDB = DASHBOARD_BACKEND == "duckdb"
+
+# Windows are whole UTC days so a cached slice stays valid (same key) for the whole day
+HISTORY_DAYS = 60
+FORECAST_LOOKBACK_DAYS = 14  # older buckets can only belong to superseded forecast runs
+
+MAX_FETCH_WORKERS = 8
+
+# Background refresh: how often group versions are polled, when an unviewed slice is
+# dropped, and how often groups without commit history are re-read regardless
+REFRESH_POLL_SECONDS = int(os.getenv("DASHBOARD_REFRESH_SECONDS", "60"))
+SNAPSHOT_IDLE_SECONDS = 6 * 3600
+FALLBACK_REFRESH_SECONDS = 3600
+
+
+def window_start(days):
+    """Start of the UTC day `days` days ago."""
+    return pd.Timestamp.now(tz="UTC").normalize() - pd.Timedelta(days=days)
+
+
+def read_group(fs, name, version, station=None, since=None):
+    """
+    Rows of a feature group from the configured backend; with `station` / `since`,
+    only that slice, with the filters pushed down to the store.
+    """
+    if USE_DUCKDB:
+        from src.utils import duckdb_store
+        return duckdb_store.read_metrics() if name == METRICS_FG else duckdb_store.read_rollup(name, station, since)
+
+    fg = fs.get_feature_group(name=name, version=version)
+    conditions = []
+    if station is not None:
+        conditions.append(fg.station_id == station)
+    if since is not None:
+        conditions.append(fg.hour >= pd.Timestamp(since))
+    if not conditions:
+        return fg.read()
+    condition = conditions[0]
+    for extra in conditions[1:]:
+        condition = condition & extra
+    return fg.select_all().filter(condition).read()
+
+
+def group_version(fs, name, version):
+    """Token that changes whenever new rows are published to a group (its latest commit)."""
+    if USE_DUCKDB:
+        from src.utils import duckdb_store
+        return duckdb_store.metrics_mtime() if name == METRICS_FG else duckdb_store.rollup_mtime(name)
+
+    try:
+        commits = fs.get_feature_group(name=name, version=version).commit_details(limit=1)
+    except Exception:
+        commits = None
+    if commits:
+        return max(commits)
+    # No commit history for this group: fall back to a fixed refresh period
+    return int(time.time() // FALLBACK_REFRESH_SECONDS)
+
+
+class SnapshotCache:
+    """
+    Stale-while-revalidate snapshots of feature-group reads, shared by every session.
+
+    get() serves the last snapshot of a (group, version, station, since) key; only
+    the first read of a key waits on the store. A daemon thread polls each group's
+    version token every poll_seconds. When the token changes it re-reads that
+    group's keys and swaps each new frame in, serving the old one until then.
+    Keys not viewed for idle_seconds are dropped.
+    """
+
+    def __init__(self, read, version_of, poll_seconds=REFRESH_POLL_SECONDS, idle_seconds=SNAPSHOT_IDLE_SECONDS):
+        self._read = read
+        self._version_of = version_of
+        self._poll_seconds = poll_seconds
+        self._idle_seconds = idle_seconds
+        self._snapshots = {}  # key -> (version token, frame)
+        self._last_access = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self._poller = None
+
+    def get(self, name, version, station=None, since=None):
+        key = (name, version, station, since)
+        self._last_access[key] = time.monotonic()
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            with self._key_lock(key):
+                snapshot = self._snapshots.get(key)
+                if snapshot is None:
+                    snapshot = self._snapshots[key] = self._load(key, self._version_of(name, version))
+            self._start_poller()
+        return snapshot[1]
+
+    def refresh(self):
+        """One polling pass: drop idle keys, then re-read keys whose group has a new version."""
+        now = time.monotonic()
+        tokens = {}
+        for key in list(self._snapshots):
+            if now - self._last_access.get(key, now) > self._idle_seconds:
+                self._evict(key)
+                continue
+
+            group = key[:2]
+            if group not in tokens:
+                try:
+                    tokens[group] = self._version_of(*group)
+                except Exception:
+                    logger.exception(f"Could not check the version of {group[0]}")
+                    tokens[group] = None
+            if tokens[group] is None or tokens[group] == self._snapshots[key][0]:
+                continue
+
+            try:
+                snapshot = self._load(key, tokens[group])
+            except Exception:
+                logger.exception(f"Could not refresh {key}; serving the previous snapshot")
+                continue
+            # A single assignment: readers get the old frame or the new one, never a partial one
+            self._snapshots[key] = snapshot
+
+    def _load(self, key, token):
+        # The token is taken before the read, so a commit landing mid-read triggers another refresh
+        return token, self._read(*key)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _evict(self, key):
+        with self._lock:
+            self._snapshots.pop(key, None)
+            self._last_access.pop(key, None)
+            self._key_locks.pop(key, None)
+
+    def _start_poller(self):
+        with self._lock:
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll, name="dashboard-refresh", daemon=True)
+                self._poller.start()
+
+    def _poll(self):
+        while True:
+            time.sleep(self._poll_seconds)
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Dashboard snapshot refresh failed")
+
+
+def latest_run(df):
+    """Forecast groups keep every past run's hours; keep the run that reaches furthest ahead."""
+    if df.empty or "run_id" not in df.columns:
+        return df
+    return df[df["run_id"] == df.loc[df["hour"].idxmax(), "run_id"]]
+
+
+def latest_metrics(df):
+    """Latest run's metrics per model and station, one column per metric (mae, ...)."""
+    if df.empty:
+        return df
+    latest = df[df["run_at"] == df.groupby(["model", "station_id"])["run_at"].transform("max")]
+    return (
+        latest.pivot_table(index=["model", "strategy", "station_id"], columns="metric", values="value")
+        .rename_axis(columns=None).reset_index()
+    )
+
+
+def station_rows(df, station):
+    """One station's rows, oldest first, with a tz-naive datetime `hour`."""
+    if df.empty:
+        return df
+    df = df[df["station_id"] == station].copy()
+    df["hour"] = pd.to_datetime(df["hour"], errors="coerce", utc=True).dt.tz_localize(None)
+    return df.dropna(subset=["hour"]).sort_values("hour")
+
+
+def fetch_concurrently(loaders, max_workers=MAX_FETCH_WORKERS):
+    """
+    Run {key: zero-argument loader} on a thread pool and yield (key, result) as
+    each one finishes, so callers can render partial results. Workers get the
+    script run context, so st.cache_resource and st.warning work inside them.
+    """
+    ctx = get_script_run_ctx()
+
+    def run(loader):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return loader()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(loaders)))) as pool:
+        futures = {pool.submit(run, loader): key for key, loader in loaders.items()}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -1,8 +1,14 @@
 import os
+from functools import partial
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import hopsworks
+
+from dashboard_data import (
+    FORECAST_LOOKBACK_DAYS, HISTORY_DAYS, METRICS_FG, ROLLUP_FG_VERSION, SnapshotCache, USE_DUCKDB,
+    latest_metrics, latest_run, fetch_concurrently, group_version, read_group, rollup_group_name, station_rows, window_start
+)
 
 # ---------- CONFIG ----------
 st.set_page_config(page_title="Model Monitoring - Citi Bike", layout="wide")
@@ -39,24 +45,25 @@ STATION_NAME_MAP = {
     "HB103": "14th Street Hoboken"
 }
 
-# Match the exact feature group names from your Hopsworks setup
+# Match the exact feature group names from your Hopsworks setup;
+# "metrics" is the model name in the citibike_model_metrics table
 MODELS = {
     "Lag-28 Model": {
-        "metrics": "citibike_model_metrics_lag28",
+        "metrics": "LGBMLag28",
         "predictions": "citibike_predictions_lag28",
         "forecast": "citibike_forecast_lag28",
         "strategy": "All Lags",
         "color": COLOR_BLUE
     },
     "Top-K Model": {
-        "metrics": "citibike_model_metrics_topk",
+        "metrics": "LGBMTopK",
         "predictions": "citibike_predictions_topk",
         "forecast": "citibike_forecast_topk",
         "strategy": "Top 10 Features",
         "color": COLOR_PINK
     },
     "PCA Model": {
-        "metrics": "citibike_model_metrics_pca",
+        "metrics": "LGBMPCA",
         "predictions": "citibike_predictions_pca",
         "forecast": "citibike_forecast_pca",
         "strategy": "PCA Reduction",
@@ -65,7 +72,7 @@ MODELS = {
     # Removed Naive Model since it doesn't have prediction data in Hopsworks
     # You can uncomment if you add this feature group later
     # "Naive Model": {
-    #     "metrics": "citibike_model_metrics_baseline",
+    #     "metrics": "naive_lag_1",
     #     "predictions": "citibike_predictions_baseline", 
     #     "forecast": "citibike_forecast_baseline",
     #     "strategy": "Naive",
@@ -76,6 +83,8 @@ MODELS = {
 # ---------- HOPSWORKS CONNECTION ----------
 @st.cache_resource
 def get_hopsworks_connection():
+    # Imported here so the DuckDB backend runs without the Hopsworks client installed
+    import hopsworks
     try:
         project = hopsworks.login(
             project=os.environ["HOPSWORKS_PROJECT_NAME"],
@@ -89,12 +98,23 @@ def get_hopsworks_connection():
         raise e
 
 # ---------- FEATURE GROUP LOADER ----------
-@st.cache_data(ttl=3600)
+@st.cache_resource
+def get_snapshot_cache():
+    """One per server process: every session is served from snapshots refreshed in the background."""
+    fs = None if USE_DUCKDB else get_hopsworks_connection().get_feature_store()
+    return SnapshotCache(partial(read_group, fs), partial(group_version, fs))
+
 def load_fg(name: str, version: int = 1):
     try:
-        project = get_hopsworks_connection()
-        fs = project.get_feature_store()
-        return fs.get_feature_group(name=name, version=version).read()
+        return get_snapshot_cache().get(name, version)
+    except Exception as e:
+        st.warning(f"Could not load feature group {name}: {e}")
+        return pd.DataFrame()
+
+def load_station_fg(name: str, version: int, station: str, since=None):
+    """Only the viewed (group, station, window) slices are read and kept."""
+    try:
+        return get_snapshot_cache().get(name, version, station, since)
     except Exception as e:
         st.warning(f"Could not load feature group {name}: {e}")
         return pd.DataFrame()
@@ -102,9 +122,10 @@ def load_fg(name: str, version: int = 1):
 # ---------- Load MAE Metrics ----------
 def load_all_metrics():
     dfs = {}
+    metrics_df = latest_metrics(load_fg(METRICS_FG))
     for model_name, model_info in MODELS.items():
         try:
-            df = load_fg(model_info["metrics"])
+            df = metrics_df[metrics_df["model"] == model_info["metrics"]].copy() if not metrics_df.empty else metrics_df
             if not df.empty:
                 df["Model"] = model_name
                 dfs[model_name] = df
@@ -113,51 +134,122 @@ def load_all_metrics():
     return dfs
 
 # ---------- Load Time Series Data ----------
-def load_timeseries_predictions(is_forecast, station):
-    dfs = []
-    for model_name, model_info in MODELS.items():
-        try:
-            # Skip naive/baseline model if feature group doesn't exist
-            if model_name == "Naive Model" and not is_forecast:
-                continue
-                
-            feature_group = model_info["forecast"] if is_forecast else model_info["predictions"]
-            df = load_fg(feature_group)
-            
-            if not df.empty:
-                # Filter by station
-                df = df[df["station_id"] == station]
-                
-                # Skip if no data for this station
-                if df.empty:
-                    continue
-                
-                # Make sure 'hour' is datetime
-                if not pd.api.types.is_datetime64_dtype(df["hour"]):
-                    df["hour"] = pd.to_datetime(df["hour"], errors='coerce')
-                
-                # Drop rows with NaT values in hour
-                df = df.dropna(subset=["hour"])
-                
-                # Convert to pandas datetime without timezone for consistent comparison
-                df["hour"] = df["hour"].dt.tz_localize(None)
-                
-                # Filter historical data for the past 60 days
-                if not is_forecast:
-                    current_time = pd.Timestamp.now()
-                    sixty_days_ago = current_time - pd.Timedelta(days=60)
-                    df = df[df['hour'] >= sixty_days_ago]
-                
-                # Rename column and add model information
-                df = df.rename(columns={"predicted_rides": "Rides"})
-                df["Model"] = model_name
-                
-                # Select relevant columns
-                dfs.append(df[["hour", "Rides", "Model"]])
-        except Exception as e:
-            st.warning(f"Error loading {model_name} prediction data: {e}")
-    
-    return pd.concat(dfs) if dfs else pd.DataFrame()
+def load_model_timeseries(model_name, is_forecast, station):
+    """One model's history or forecast for a station as hour/Rides/Model rows (None if unavailable)."""
+    model_info = MODELS[model_name]
+    try:
+        # Daily (history) and 6-hour (forecast) means are materialized at upload time
+        feature_group = (
+            rollup_group_name(model_info["forecast"], "6h") if is_forecast
+            else rollup_group_name(model_info["predictions"], "daily")
+        )
+        # Station and window are pushed down to the store (history: the last 60 days)
+        since = window_start(FORECAST_LOOKBACK_DAYS if is_forecast else HISTORY_DAYS)
+        df = station_rows(load_station_fg(feature_group, ROLLUP_FG_VERSION, station, since), station)
+        if df.empty:
+            return None
+
+        # Forecast groups keep every past run's buckets; show the latest run only
+        if is_forecast:
+            df = latest_run(df)
+
+        # Rename column and add model information
+        df = df.rename(columns={"predicted_rides": "Rides"})
+        df["Model"] = model_name
+        return df[["hour", "Rides", "Model"]]
+    except Exception as e:
+        st.warning(f"Error loading {model_name} prediction data: {e}")
+        return None
+
+def history_figure(past_df):
+    # Already daily averages (<predictions>_daily rollups)
+    fig = px.line(
+        past_df, 
+        x="hour", 
+        y="Rides", 
+        color="Model",
+        title="Predictions by Model - Last 60 Days (Daily Average)",
+        color_discrete_map={
+            model_name: model_info["color"] for model_name, model_info in MODELS.items()
+        }
+    )
+    fig.update_layout(
+        font=dict(color='white'),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(
+            title="Date",
+            tickformat="%b %d",
+            tickangle=0,
+        ),
+        yaxis=dict(title="Average Rides")
+    )
+    # Make lines thicker for better visibility
+    fig.update_traces(line=dict(width=2.5))
+    return fig
+
+def forecast_figure(future_df):
+    # Already 6-hour means (<forecast>_6h rollups)
+    fig = px.line(
+        future_df, 
+        x="hour", 
+        y="Rides", 
+        color="Model",
+        title="Forecast by Model - Next 7 Days (6-Hour Intervals)",
+        color_discrete_map={
+            model_name: model_info["color"] for model_name, model_info in MODELS.items()
+        }
+    )
+    fig.update_layout(
+        font=dict(color='white'),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(
+            title="Date",
+            tickformat="%b %d",
+            dtick="D1"  # One tick per day
+        ),
+        yaxis=dict(title="Predicted Rides")
+    )
+    # Make lines thicker and add markers for better visualization
+    fig.update_traces(
+        line=dict(width=3),
+        mode='lines+markers',
+        marker=dict(size=6)
+    )
+    return fig
+
+def render_timeseries(station):
+    """
+    Fetch every model's history and forecast at once and redraw each chart as
+    its models arrive, so first paint waits on the fastest read, not all of them.
+    """
+    get_snapshot_cache()  # one shared session and cache, created before the workers start
+    st.subheader("Historical Predictions (Last 60 Days)")
+    past_slot = st.empty()
+    st.subheader("Forecasts (Next 7 Days)")
+    future_slot = st.empty()
+
+    loaded = {False: [], True: []}
+    slots = {False: past_slot, True: future_slot}
+    figures = {False: history_figure, True: forecast_figure}
+    loaders = {
+        (model_name, is_forecast): partial(load_model_timeseries, model_name, is_forecast, station)
+        for is_forecast in (False, True)
+        for model_name in MODELS
+        # Skip naive/baseline model if feature group doesn't exist
+        if not (model_name == "Naive Model" and not is_forecast)
+    }
+    for (model_name, is_forecast), df in fetch_concurrently(loaders):
+        if df is None:
+            continue
+        loaded[is_forecast].append(df)
+        slots[is_forecast].plotly_chart(figures[is_forecast](pd.concat(loaded[is_forecast])), use_container_width=True)
+
+    if not loaded[False]:
+        past_slot.info("No historical prediction data available for the selected station.")
+    if not loaded[True]:
+        future_slot.info("No forecast data available for the selected station.")
 
 # ---------- Main App ----------
 def main():
@@ -237,80 +329,7 @@ def main():
         if len(selected_stations) == 1:
             station_code = [k for k, v in STATION_NAME_MAP.items() if v == selected_stations[0]][0]
 
-            st.subheader("Historical Predictions (Last 60 Days)")
-            past_df = load_timeseries_predictions(is_forecast=False, station=station_code)
-            
-            if not past_df.empty:
-                # Resample to daily averages to reduce noise
-                past_df['date'] = past_df['hour'].dt.date
-                daily_past_df = past_df.groupby(['date', 'Model']).agg({'Rides': 'mean'}).reset_index()
-                daily_past_df['hour'] = pd.to_datetime(daily_past_df['date'])
-                
-                fig1 = px.line(
-                    daily_past_df, 
-                    x="hour", 
-                    y="Rides", 
-                    color="Model",
-                    title="Predictions by Model - Last 60 Days (Daily Average)",
-                    color_discrete_map={
-                        model_name: model_info["color"] for model_name, model_info in MODELS.items()
-                    }
-                )
-                fig1.update_layout(
-                    font=dict(color='white'),
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    xaxis=dict(
-                        title="Date",
-                        tickformat="%b %d",
-                        tickangle=0,
-                    ),
-                    yaxis=dict(title="Average Rides")
-                )
-                # Make lines thicker for better visibility
-                fig1.update_traces(line=dict(width=2.5))
-                st.plotly_chart(fig1, use_container_width=True)
-            else:
-                st.info("No historical prediction data available for the selected station.")
-
-            st.subheader("Forecasts (Next 7 Days)")
-            future_df = load_timeseries_predictions(is_forecast=True, station=station_code)
-            
-            if not future_df.empty:
-                # Resample to 6-hour intervals to reduce noise and make trends clearer
-                future_df['hour_bin'] = future_df['hour'].dt.floor('6H')
-                future_resampled = future_df.groupby(['hour_bin', 'Model']).agg({'Rides': 'mean'}).reset_index()
-                
-                fig2 = px.line(
-                    future_resampled, 
-                    x="hour_bin", 
-                    y="Rides", 
-                    color="Model",
-                    title="Forecast by Model - Next 7 Days (6-Hour Intervals)",
-                    color_discrete_map={
-                        model_name: model_info["color"] for model_name, model_info in MODELS.items()
-                    }
-                )
-                fig2.update_layout(
-                    font=dict(color='white'),
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    xaxis=dict(
-                        title="Date",
-                        tickformat="%b %d",
-                        dtick="D1"  # One tick per day
-                    ),
-                    yaxis=dict(title="Predicted Rides")
-                )
-                # Make lines thicker and add markers for better visualization
-                fig2.update_traces(
-                    line=dict(width=3),
-                    mode='lines+markers',
-                    marker=dict(size=6)
-                )
-                st.plotly_chart(fig2, use_container_width=True)
-            else:
-                st.info("No forecast data available for the selected station.")
+            render_timeseries(station_code)
     else:
         st.warning("No data available for the selected stations.")
 
@@ -0,0 +1,118 @@
+import os
+import json
+import zipfile
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Point TRIPDATA_URL at another host (e.g. a local HTTP server) to mirror the S3 bucket
+ZIP_URL_PREFIX = os.getenv("TRIPDATA_URL", "https://s3.amazonaws.com/tripdata/")
+MAX_WORKERS = 4
+CHUNK_BYTES = 1 << 20
+STATE_DIR_NAME = ".downloads"
+
+def make_session(pool_size=MAX_WORKERS):
+    """HTTP session whose connection pool is shared by all download threads."""
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def _load_state(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _save_state(path, state):
+    with open(path, "w") as f:
+        json.dump(state, f, indent=2)
+
+def download_and_extract(session, file_name, output_dir, url_prefix=ZIP_URL_PREFIX):
+    """
+    Stream one ZIP to disk and extract it into output_dir.
+
+    The remote ETag (or Last-Modified) and Content-Length are stored next to the
+    partial file, so a rerun skips archives that are unchanged and resumes
+    interrupted downloads with a Range request. A server that sends no validator
+    or no length cannot prove the archive is unchanged, so it is always fetched
+    again from the start. Returns "downloaded", "unchanged" or "missing".
+    """
+    url = url_prefix + file_name
+    state_dir = os.path.join(output_dir, STATE_DIR_NAME)
+    os.makedirs(state_dir, exist_ok=True)
+    state_path = os.path.join(state_dir, file_name + ".json")
+    part_path = os.path.join(state_dir, file_name + ".part")
+
+    head = session.head(url, timeout=30)
+    if head.status_code != 200:
+        # S3 answers 403 rather than 404 for keys that do not exist yet
+        return "missing"
+    etag = head.headers.get("ETag")
+    last_modified = head.headers.get("Last-Modified")
+    length = int(head.headers.get("Content-Length", 0)) or None
+    remote = {"etag": etag, "last_modified": last_modified, "length": length}
+
+    state = _load_state(state_path)
+    # Without a validator and a length, None == None would wrongly match any archive
+    known = (etag is not None or last_modified is not None) and length is not None
+    same_object = known and all(state.get(key) == value for key, value in remote.items())
+    if same_object and state.get("extracted") and all(
+        os.path.exists(os.path.join(output_dir, name)) for name in state["extracted"]
+    ):
+        return "unchanged"
+
+    if not same_object and os.path.exists(part_path):
+        # The archive changed upstream, so the partial bytes are useless
+        os.remove(part_path)
+    _save_state(state_path, remote)
+
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if length is None or offset < length:
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        with session.get(url, headers=headers, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            # A 200 means the server ignored the Range header, so start over
+            mode = "ab" if response.status_code == 206 else "wb"
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_BYTES):
+                    f.write(chunk)
+
+    if length is not None and os.path.getsize(part_path) != length:
+        raise IOError(f"Incomplete download for {file_name}: {os.path.getsize(part_path)}/{length} bytes")
+
+    with zipfile.ZipFile(part_path) as zf:
+        extracted = [name for name in zf.namelist() if name.endswith(".csv") and not name.startswith("__MACOSX")]
+        zf.extractall(output_dir, members=extracted)
+
+    os.remove(part_path)
+    _save_state(state_path, {**remote, "extracted": extracted})
+    return "downloaded"
+
+def download_all(file_names, output_dir, max_workers=MAX_WORKERS, url_prefix=ZIP_URL_PREFIX):
+    """Download and extract archives concurrently; returns {file_name: status}."""
+    os.makedirs(output_dir, exist_ok=True)
+    session = make_session(max_workers)
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(download_and_extract, session, name, output_dir, url_prefix): name
+            for name in file_names
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"❌ Error downloading {name}: {e}")
+                results[name] = "failed"
+                continue
+            icon = {"downloaded": "📦", "unchanged": "✅", "missing": "❌"}[results[name]]
+            print(f"{icon} {name}: {results[name]}")
+
+    return results
@@ -1,50 +1,84 @@
 import os
+import re
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from glob import glob
 
 RAW_DIR = "data/raw"
-PROCESSED_PATH = "data/processed/jc_all_cleaned.csv"
+PROCESSED_DIR = "data/processed/jc_trips"
 os.makedirs("data/processed", exist_ok=True)
 
+# Rows per read; peak memory is bounded by one chunk, not by the number of months
+CHUNK_SIZE = 250_000
+
+# Only the fields downstream steps use, read as plain strings and parsed explicitly
+USE_COLUMNS = ["started_at", "ended_at", "start_station_id", "end_station_id"]
+CSV_DTYPES = {col: "string" for col in USE_COLUMNS}
+TRIP_SCHEMA = pa.schema([
+    ("started_at", pa.timestamp("ns")),
+    ("ended_at", pa.timestamp("ns")),
+    ("start_station_id", pa.string()),
+    ("end_station_id", pa.string()),
+])
+
+def partition_month(file):
+    """Map JC-YYYYMM-citibike-tripdata.csv to its YYYY-MM partition."""
+    match = re.search(r"JC-(\d{4})(\d{2})", os.path.basename(file))
+    return f"{match.group(1)}-{match.group(2)}" if match else "unknown"
+
+def clean_chunk(df):
+    # ISO8601 accepts timestamps with and without milliseconds; floor drops them
+    for col in ["started_at", "ended_at"]:
+        df[col] = pd.to_datetime(df[col], format="ISO8601", errors="coerce").dt.floor("s")
+
+    # Drop rows with missing or invalid critical fields
+    return df.dropna(subset=USE_COLUMNS)
+
+def stream_clean_file(file, output_dir=PROCESSED_DIR, chunksize=CHUNK_SIZE):
+    """
+    Clean one monthly CSV chunk by chunk into output_dir/month=YYYY-MM/<name>.parquet.
+    Returns ride counts per year, or None if the partition is already up to date.
+    """
+    part_dir = os.path.join(output_dir, f"month={partition_month(file)}")
+    out_path = os.path.join(part_dir, os.path.basename(file).replace(".csv", ".parquet"))
+    if os.path.exists(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(file):
+        print(f"⏭️ Up to date: {out_path}")
+        return None
+
+    os.makedirs(part_dir, exist_ok=True)
+    tmp_path = out_path + ".tmp"
+    year_counts = pd.Series(dtype="int64")
+
+    with pq.ParquetWriter(tmp_path, TRIP_SCHEMA) as writer:
+        for chunk in pd.read_csv(file, usecols=USE_COLUMNS, dtype=CSV_DTYPES, chunksize=chunksize):
+            chunk = clean_chunk(chunk)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=TRIP_SCHEMA, preserve_index=False))
+            year_counts = year_counts.add(chunk["started_at"].dt.year.value_counts(), fill_value=0)
+
+    # Only publish complete partitions
+    os.replace(tmp_path, out_path)
+    return year_counts
+
 def load_and_clean_data():
     # Load all JC files
     csv_files = sorted(glob(os.path.join(RAW_DIR, "JC-*.csv")))
     print(f"📦 Found {len(csv_files)} raw JC files.")
 
-    all_dfs = []
+    year_counts = pd.Series(dtype="int64")
 
     for file in csv_files:
         print(f"🔄 Processing: {file}")
         try:
-            df = pd.read_csv(file)
-
-            # Strip milliseconds (e.g., .123) from time strings
-            df["started_at"] = df["started_at"].astype(str).str.split(".").str[0]
-            df["ended_at"] = df["ended_at"].astype(str).str.split(".").str[0]
-
-            # Parse cleaned strings into datetime
-            df["started_at"] = pd.to_datetime(df["started_at"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
-            df["ended_at"] = pd.to_datetime(df["ended_at"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
-
-            # Drop rows with missing or invalid critical fields
-            df.dropna(subset=["started_at", "ended_at", "start_station_id", "end_station_id"], inplace=True)
-
-            # Add date parts for later feature engineering
-            df["date"] = df["started_at"].dt.date
-            df["hour"] = df["started_at"].dt.hour
-            df["weekday"] = df["started_at"].dt.dayofweek
-
-            all_dfs.append(df)
+            counts = stream_clean_file(file)
+            if counts is not None:
+                year_counts = year_counts.add(counts, fill_value=0)
         except Exception as e:
             print(f"❌ Skipping {file} due to error: {e}")
 
-    # Combine all cleaned data
-    full_df = pd.concat(all_dfs, ignore_index=True)
-    full_df.to_csv(PROCESSED_PATH, index=False)
-
-    print(f"✅ Cleaned data saved to {PROCESSED_PATH}")
-    print("📊 Year distribution:")
-    print(full_df["started_at"].dt.year.value_counts().sort_index())
+    print(f"✅ Cleaned data saved to {PROCESSED_DIR}")
+    print("📊 Year distribution (newly processed files):")
+    print(year_counts.astype("int64").sort_index())
 
 if __name__ == "__main__":
     load_and_clean_data()
@@ -1,9 +1,14 @@
+import sys
 import os
-import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import shutil
 from glob import glob
 
+from src.data.preprocess_data import stream_clean_file
+
 RAW_DIR = "data/raw"
-OUTPUT_PATH = "data/processed/jc_recent_cleaned.csv"
+OUTPUT_DIR = "data/processed/jc_recent_trips"
 os.makedirs("data/processed", exist_ok=True)
 
 def get_most_recent_files(n=2):
@@ -12,38 +17,20 @@ def get_most_recent_files(n=2):
     return files[:n]
 
 def preprocess(files):
-    all_dfs = []
+    # The recent window is rebuilt from scratch so old months drop out of it
+    shutil.rmtree(OUTPUT_DIR, ignore_errors=True)
 
+    processed = 0
     for file in files:
         print(f"🔄 Processing: {file}")
         try:
-            df = pd.read_csv(file)
-
-            # Remove milliseconds from timestamps
-            df["started_at"] = df["started_at"].astype(str).str.split(".").str[0]
-            df["ended_at"] = df["ended_at"].astype(str).str.split(".").str[0]
-
-            # Convert to datetime
-            df["started_at"] = pd.to_datetime(df["started_at"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
-            df["ended_at"] = pd.to_datetime(df["ended_at"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
-
-            # Drop nulls in critical columns
-            df.dropna(subset=["started_at", "ended_at", "start_station_id", "end_station_id"], inplace=True)
-
-            # Optional: Keep only useful columns
-            df["date"] = df["started_at"].dt.date
-            df["hour"] = df["started_at"].dt.hour
-            df["weekday"] = df["started_at"].dt.dayofweek
-
-            all_dfs.append(df)
+            stream_clean_file(file, output_dir=OUTPUT_DIR)
+            processed += 1
         except Exception as e:
             print(f"❌ Error processing {file}: {e}")
 
-    # Combine and export
-    if all_dfs:
-        combined = pd.concat(all_dfs, ignore_index=True)
-        combined.to_csv(OUTPUT_PATH, index=False)
-        print(f"✅ Cleaned data saved to {OUTPUT_PATH}")
+    if processed:
+        print(f"✅ Cleaned data saved to {OUTPUT_DIR}")
     else:
         print("⚠️ No data processed.")
 
@@ -1,40 +1,115 @@
-import pandas as pd
+import sys
 import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import json
+import numpy as np
+import pandas as pd
+
+from src.features.engineering_features import load_hourly_counts
+from src.features.hourly_grid import (
+    LATE_TRIP_OVERLAP_HOURS, N_LAGS, dense_hourly_grid, first_observed_index, grid_to_frame
+)
 
-INPUT_PATH = "data/processed/jc_recent_cleaned.csv"
+INPUT_DIR = "data/processed/jc_recent_trips"
 OUTPUT_PATH = "data/processed/jc_recent_hourly_features.csv"
+STATE_PATH = "data/processed/recent_feature_state.json"
 os.makedirs("data/processed", exist_ok=True)
 
+def load_state(path=STATE_PATH):
+    """
+    Tail state from the previous run: the newest processed hour (shared by all
+    stations on the dense grid) and each station's N_LAGS hourly counts ending
+    at tail_hour, LATE_TRIP_OVERLAP_HOURS before it. Everything after tail_hour
+    is re-aggregated on the next run.
+    """
+    try:
+        with open(path) as f:
+            raw = json.load(f)
+    except FileNotFoundError:
+        return None
+    if "tails" not in raw:
+        # Older per-row state does not line up with the hourly grid; rebuild from the window
+        return None
+    last_hour = pd.Timestamp(raw["last_hour"])
+    # State written before the overlap existed has its tail at the last hour
+    tail_hour = pd.Timestamp(raw.get("tail_hour", raw["last_hour"]))
+    return {"last_hour": last_hour, "tail_hour": tail_hour, "tails": raw["tails"]}
+
+def save_state(state, path=STATE_PATH):
+    raw = {
+        "last_hour": state["last_hour"].isoformat(),
+        "tail_hour": state["tail_hour"].isoformat(),
+        "tails": {station: [float(v) for v in tail] for station, tail in state["tails"].items()},
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(raw, f)
+    os.replace(tmp_path, path)
+
+def build_incremental_features(hourly, state, n_lags=N_LAGS, overlap_hours=LATE_TRIP_OVERLAP_HOURS):
+    """
+    Emit lag rows for the hours after the stored tail: the last `overlap_hours`
+    already-processed hours (recounted, so late trips are included) plus the new ones.
+
+    Each station's stored tail is prepended to its dense hourly counts, so
+    the first emitted hours get fully populated lags. Returns (features, updated state).
+    """
+    if state is not None:
+        hourly = hourly[hourly["hour"] > state["tail_hour"]]
+    if hourly.empty:
+        return grid_to_frame([], pd.DatetimeIndex([]), np.zeros((0, 0)), n_lags), state
+
+    tails = state["tails"] if state is not None else {}
+    start = state["tail_hour"] + pd.Timedelta(hours=1) if state is not None else hourly["hour"].min()
+    new_hours = pd.date_range(start, hourly["hour"].max(), freq="h")
+    stations = sorted(set(tails) | set(hourly["start_station_id"]))
+    stations, _, new_counts = dense_hourly_grid(hourly, stations=stations, hours=new_hours)
+
+    # Known stations continue from their stored tail; new ones start with zeros
+    tail_counts = np.zeros((len(stations), n_lags), dtype=np.float64)
+    known = np.array([station in tails for station in stations], dtype=bool)
+    for i in np.flatnonzero(known):
+        tail_counts[i] = tails[stations[i]]
+    counts = np.hstack([tail_counts, new_counts])
+    hours = pd.date_range(start - pd.Timedelta(hours=n_lags), periods=counts.shape[1], freq="h")
+
+    # New stations still need n_lags hours of their own history before emitting rows
+    first_valid = np.where(known, n_lags, first_observed_index(counts) + n_lags)
+    features = grid_to_frame(stations, hours, counts, n_lags, first_valid)
+
+    # The next tail ends overlap_hours before the newest hour (never before the current one)
+    tail_hour = max(new_hours[-1] - pd.Timedelta(hours=overlap_hours), start - pd.Timedelta(hours=1))
+    end = hours.get_loc(tail_hour) + 1
+    updated = {
+        "last_hour": new_hours[-1],
+        "tail_hour": tail_hour,
+        "tails": {station: counts[i, end - n_lags:end].tolist() for i, station in enumerate(stations)},
+    }
+    return features, updated
+
 def engineer_features():
-    print(f"📥 Loading cleaned data from {INPUT_PATH}")
-    df = pd.read_csv(INPUT_PATH, parse_dates=["started_at"])
+    state = load_state()
 
-    # Extract hour and station ID
-    df["hour"] = df["started_at"].dt.floor("H")
-    df["start_station_id"] = df["start_station_id"].astype(str)
+    # Only trips after the stored tail (the overlap window plus new hours) are read at all
+    since = state["tail_hour"] + pd.Timedelta(hours=1) if state is not None else None
+    print(f"📥 Loading cleaned data from {INPUT_DIR} (since {since})")
 
     # Aggregate: rides per hour per station
-    hourly = (
-        df.groupby(["start_station_id", "hour"])
-        .size()
-        .reset_index(name="rides")
-        .sort_values(["start_station_id", "hour"])
-    )
+    hourly = load_hourly_counts(INPUT_DIR, since=since)
 
-    # Add lag features
-    for lag in range(1, 29):
-        hourly[f"lag_{lag}"] = hourly.groupby("start_station_id")["rides"].shift(lag)
+    features, state = build_incremental_features(hourly, state)
 
     # Add time-based features
-    hourly["hour_of_day"] = hourly["hour"].dt.hour
-    hourly["day_of_week"] = hourly["hour"].dt.dayofweek
-
-    # Drop rows with incomplete lag values
-    hourly.dropna(inplace=True)
+    features["hour"] = pd.to_datetime(features["hour"])
+    features["hour_of_day"] = features["hour"].dt.hour
+    features["day_of_week"] = features["hour"].dt.dayofweek
 
     # Export
-    hourly.to_csv(OUTPUT_PATH, index=False)
-    print(f"✅ Engineered features saved to {OUTPUT_PATH}")
+    features.to_csv(OUTPUT_PATH, index=False)
+    if state is not None:
+        save_state(state)
+    print(f"✅ Engineered {len(features)} new and recounted feature rows saved to {OUTPUT_PATH}")
 
 if __name__ == "__main__":
     engineer_features()
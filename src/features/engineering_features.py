@@ -1,41 +1,53 @@
-import pandas as pd
+import sys
 import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pandas as pd
+from glob import glob
 
-INPUT_PATH = "data/processed/jc_all_cleaned.csv"
+from src.features.hourly_grid import N_LAGS, dense_hourly_grid, first_observed_index, grid_to_frame
+
+INPUT_DIR = "data/processed/jc_trips"
 OUTPUT_PATH = "data/processed/jc_hourly_features.csv"
 os.makedirs("data/processed", exist_ok=True)
 
-def engineer_features():
-    df = pd.read_csv(INPUT_PATH)
-    df["started_at"] = pd.to_datetime(df["started_at"], errors="coerce")
+def load_hourly_counts(input_dir=INPUT_DIR, since=None):
+    """
+    Aggregate ride counts per start station and hour, one month partition at a
+    time, so only two columns of a single month are ever held in memory.
+    With `since`, only trips starting at or after that time are read.
+    """
+    filters = [("started_at", ">=", pd.Timestamp(since))] if since is not None else None
+    counts = []
+    for path in sorted(glob(os.path.join(input_dir, "month=*", "*.parquet"))):
+        trips = pd.read_parquet(path, columns=["started_at", "start_station_id"], filters=filters)
+        trips["hour"] = trips["started_at"].dt.floor("h")  # floor to hour
+        counts.append(trips.groupby(["start_station_id", "hour"]).size())
+
+    if not counts:
+        return pd.DataFrame(columns=["start_station_id", "hour", "rides"])
+
+    # Trips near a month boundary can appear in two files, so sum across partitions
+    hourly = pd.concat(counts).groupby(level=["start_station_id", "hour"]).sum()
+    hourly = hourly.reset_index(name="rides").sort_values(["start_station_id", "hour"])
+    hourly["start_station_id"] = hourly["start_station_id"].astype(str)
+    return hourly.reset_index(drop=True)
 
+def engineer_features():
+    # Aggregate: ride count per hour per start station
+    hourly = load_hourly_counts()
 
-    # Extract time parts
-    df["hour"] = df["started_at"].dt.floor("H")  # floor to hour
-    df["start_station_id"] = df["start_station_id"].astype(str)
+    # Dense station x hour grid (zeros for hours without rides); lags 1-28 in one strided pass
+    stations, hours, counts = dense_hourly_grid(hourly)
 
-    # Aggregate: ride count per hour per start station
-    hourly = (
-        df.groupby(["start_station_id", "hour"])
-        .size()
-        .reset_index(name="rides")
-        .sort_values(["start_station_id", "hour"])
-    )
-
-    # Add lag features (past 1 to 28 hours)
-    for lag in range(1, 29):
-        hourly[f"lag_{lag}"] = (
-            hourly.groupby("start_station_id")["rides"].shift(lag)
-        )
+    # Skip each station's first 28 hours of service, where the lag window is incomplete
+    first_valid = first_observed_index(counts) + N_LAGS
+    hourly = grid_to_frame(stations, hours, counts, N_LAGS, first_valid)
 
     # Add time-based features
     hourly["hour_of_day"] = hourly["hour"].dt.hour
     hourly["day_of_week"] = hourly["hour"].dt.dayofweek
 
-    # Drop rows with NA in lag columns (first 28 rows per station)
-    
-    hourly.dropna(inplace=True)
-
     hourly.to_csv(OUTPUT_PATH, index=False)
     print(f"Saved engineered features to {OUTPUT_PATH}")
 
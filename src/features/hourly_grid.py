@@ -0,0 +1,90 @@
+"""
+Dense station x hour ride-count grid and array-backed lag construction.
+
+Hours without rides are zero-filled, so lag_k is always the count exactly k
+hours earlier (not k observed rows earlier), and all lags come from a single
+strided view over one contiguous array instead of one groupby-shift per lag.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+N_LAGS = 28
+
+# Trailing hours re-aggregated and re-uploaded on every incremental run, so trips
+# that arrive late (after their hour was first processed) correct the stored counts
+LATE_TRIP_OVERLAP_HOURS = 48
+
+
+def dense_hourly_grid(hourly, stations=None, hours=None):
+    """
+    Pivot sparse (start_station_id, hour, rides) rows into a dense
+    (n_stations, n_hours) float64 array, with zeros for hours without rides.
+
+    Returns (stations, hours, counts). Rows outside the given stations/hours are ignored.
+    """
+    if stations is None:
+        stations = sorted(hourly["start_station_id"].unique())
+    if hours is None:
+        hours = pd.date_range(hourly["hour"].min(), hourly["hour"].max(), freq="h")
+    stations = pd.Index(stations)
+    hours = pd.DatetimeIndex(hours)
+
+    counts = np.zeros((len(stations), len(hours)), dtype=np.float64)
+    rows = stations.get_indexer(hourly["start_station_id"])
+    cols = hours.get_indexer(pd.DatetimeIndex(hourly["hour"]))
+    keep = (rows >= 0) & (cols >= 0)
+    counts[rows[keep], cols[keep]] = hourly["rides"].to_numpy()[keep]
+    return stations, hours, counts
+
+
+def first_observed_index(counts):
+    """Column of each station's first non-zero count (n_hours if it never had a ride)."""
+    observed = counts > 0
+    return np.where(observed.any(axis=1), observed.argmax(axis=1), counts.shape[1])
+
+
+def lag_windows(counts, n_lags=N_LAGS):
+    """
+    Read-only (n_stations, n_hours - n_lags, n_lags) view where [s, i, k - 1]
+    is the count k hours before hour i + n_lags. No data is copied.
+    """
+    windows = sliding_window_view(counts, n_lags, axis=1)
+    # windows[s, i, j] == counts[s, i + j]; drop the last window (its target is past the end)
+    # and reverse the window so position 0 is lag_1
+    return windows[:, :-1, ::-1]
+
+
+def grid_to_frame(stations, hours, counts, n_lags=N_LAGS, first_valid=None):
+    """
+    Flatten the grid into feature rows (start_station_id, hour, rides, lag_1..lag_n)
+    for every hour with a full lag window.
+
+    first_valid: optional per-station column index of the first hour to emit,
+        e.g. to skip hours before a station's first n_lags hours of service.
+    """
+    n_targets = len(hours) - n_lags
+    lag_cols = [f"lag_{lag}" for lag in range(1, n_lags + 1)]
+    if n_targets <= 0:
+        return pd.DataFrame(columns=["start_station_id", "hour", "rides"] + lag_cols)
+
+    keep = np.ones((len(stations), n_targets), dtype=bool)
+    if first_valid is not None:
+        target_index = np.arange(n_lags, len(hours))
+        keep = target_index[None, :] >= np.asarray(first_valid)[:, None]
+
+    # Boolean indexing on the strided view gathers the kept windows in one copy
+    lags = lag_windows(counts, n_lags)[keep]
+    keep = keep.ravel()
+    frame = pd.DataFrame(lags, columns=lag_cols)
+    frame.insert(0, "start_station_id", np.repeat(np.asarray(stations, dtype=object), n_targets)[keep])
+    frame.insert(1, "hour", np.tile(hours[n_lags:].to_numpy(), len(stations))[keep])
+    frame.insert(2, "rides", counts[:, n_lags:].ravel()[keep].astype(np.int64))
+    return frame
+
+
+def train_mask(frame, train_fraction=0.8):
+    """Boolean mask of each station's first `train_fraction` of rows (in hour order)."""
+    position = frame.groupby("start_station_id").cumcount()
+    size = frame.groupby("start_station_id")["rides"].transform("size")
+    return (position < (size * train_fraction).astype(int)).to_numpy()
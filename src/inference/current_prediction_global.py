@@ -0,0 +1,47 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import json
+import pandas as pd
+
+from src.utils.fast_predict import FastPredictor
+from src.utils.feature_store import RIDE_COLUMNS, login, read_features
+from src.utils.forecasting import global_feature_frame, lag_columns, test_lag_frame
+from src.utils.model_registry import load_model, loaded_model_version
+from src.utils.prediction_store import write_predictions
+
+# ---------------- CONFIG ----------------
+MODEL_NAME = "citibike_lgbm_global"
+
+# ---------------- SETUP ----------------
+# Connect to Hopsworks
+project = login()
+fs = project.get_feature_store()
+mr = project.get_model_registry()
+
+# One artifact for every station; its metadata lists the stations it was trained on
+model, model_dir = load_model(mr, MODEL_NAME)
+with open(os.path.join(model_dir, "metadata.json")) as f:
+    metadata = json.load(f)
+stations = metadata["stations"]
+n_lags = metadata["n_lags"]
+
+df = read_features(fs, stations=stations, columns=RIDE_COLUMNS)
+
+# ---------------- MAIN ----------------
+print(f"📈 Generating current test predictions for {len(stations)} stations using the global model...")
+
+# Same per-station 80/20 split as training; predict every station's test slice in one call
+test = test_lag_frame(df, stations, n_lags)
+
+station_codes = {s: i for i, s in enumerate(stations)}
+X_test = global_feature_frame(test[lag_columns(n_lags)].to_numpy(), test["start_station_id"], test["hour"], station_codes, n_lags)
+out_all = pd.DataFrame({
+    "station_id": test["start_station_id"].values,
+    "hour": test["hour"].values,
+    "actual_rides": test["rides"].values,
+    "predicted_rides": FastPredictor(model).predict(X_test)
+})
+
+write_predictions(out_all, "predictions_lgbm_global", loaded_model_version(MODEL_NAME))
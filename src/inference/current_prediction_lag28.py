@@ -1,62 +1,47 @@
+import sys
 import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
 import pandas as pd
-import numpy as np
-import joblib
-import hopsworks
+
+from src.utils.fast_predict import FastPredictor
+from src.utils.feature_store import RIDE_COLUMNS, login, read_features
+from src.utils.forecasting import lag_columns, test_lag_frame
+from src.utils.model_registry import load_model, loaded_model_version
+from src.utils.prediction_store import write_predictions
 
 # ---------------- CONFIG ----------------
 TOP_STATIONS = ["JC115", "HB102", "HB103"]
-METRICS_PATH = "data/metrics"
 N_LAGS = 28
 
 # ---------------- SETUP ----------------
-os.makedirs(METRICS_PATH, exist_ok=True)
-
 # Connect to Hopsworks
-project = hopsworks.login()
+project = login()
 fs = project.get_feature_store()
 mr = project.get_model_registry()
 
-# Load feature group data
-fg = fs.get_feature_group("citibike_features_dataset", version=1)
-df = fg.read()
-
-# ---------------- HELPERS ----------------
-def create_lag_features(df, n_lags):
-    for lag in range(1, n_lags + 1):
-        df[f"lag_{lag}"] = df["rides"].shift(lag)
-    return df
+# Load feature group data (only the stations and columns we use)
+df = read_features(fs, stations=TOP_STATIONS, columns=RIDE_COLUMNS)
 
 # ---------------- MAIN ----------------
+# Lags on the dense hourly grid with the same per-station 80/20 split as training
+test = test_lag_frame(df, TOP_STATIONS, N_LAGS)
+
 for station in TOP_STATIONS:
     print(f"📈 Generating current test predictions for {station} using Lag-28 model...")
 
-    station_df = df[df["start_station_id"] == station].sort_values("hour").copy()
-    station_df = create_lag_features(station_df, N_LAGS).dropna()
+    station_test = test[test["start_station_id"] == station]
+    X_test, y_test = station_test[lag_columns(N_LAGS)], station_test["rides"]
 
-    X = station_df[[f"lag_{i}" for i in range(1, N_LAGS + 1)]]
-    y = station_df["rides"]
-    split = int(len(X) * 0.8)
+    # Load model from Hopsworks model registry (latest version, via the local cache)
+    model, _ = load_model(mr, f"citibike_lag28_{station}")
 
-    X_test, y_test = X.iloc[split:], y.iloc[split:]
-
-    # Load model from Hopsworks model registry
-    model_name = f"citibike_lag28_{station}"
-    model_obj = mr.get_model(model_name, version=None)  # use latest version
-    model_dir = model_obj.download()
-    model = joblib.load(os.path.join(model_dir, "model.pkl"))
-    
-
-
-
-    y_pred = model.predict(X_test)
+    y_pred = FastPredictor(model).predict(X_test)
 
     out_df = pd.DataFrame({
-        "hour": station_df.iloc[split:]["hour"],
+        "station_id": station,
+        "hour": station_test["hour"].values,
         "actual_rides": y_test.values,
         "predicted_rides": y_pred
     })
-
-    out_file = f"{METRICS_PATH}/predictions_lgbm_lag28_{station}.csv"
-    out_df.to_csv(out_file, index=False)
-    print(f"✅ Saved: {out_file}")
+    write_predictions(out_df, "predictions_lgbm_lag28", loaded_model_version(f"citibike_lag28_{station}"))
@@ -1,67 +1,45 @@
+import sys
 import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
 import pandas as pd
-import numpy as np
-import joblib
-import hopsworks
-from sklearn.decomposition import PCA
+
+from src.utils.feature_store import RIDE_COLUMNS, login, read_features
+from src.utils.forecasting import lag_columns, test_lag_frame
+from src.utils.model_registry import load_pca_pipeline, loaded_model_version
+from src.utils.prediction_store import write_predictions
 
 # ---------------- CONFIG ----------------
 TOP_STATIONS = ["JC115", "HB102", "HB103"]
-METRICS_PATH = "data/metrics"
 N_LAGS = 28
-PCA_COMPONENTS = 10
 
 # ---------------- SETUP ----------------
-os.makedirs(METRICS_PATH, exist_ok=True)
-
 # Connect to Hopsworks
-project = hopsworks.login()
+project = login()
 fs = project.get_feature_store()
 mr = project.get_model_registry()
 
-# Load feature group data
-fg = fs.get_feature_group("citibike_features_dataset", version=None)
-df = fg.read()
-
-# ---------------- HELPERS ----------------
-def create_lag_features(df, n_lags):
-    for lag in range(1, n_lags + 1):
-        df[f"lag_{lag}"] = df["rides"].shift(lag)
-    return df
+# Load feature group data (only the stations and columns we use)
+df = read_features(fs, stations=TOP_STATIONS, columns=RIDE_COLUMNS)
 
 # ---------------- MAIN ----------------
+# Lags on the dense hourly grid with the same per-station 80/20 split as training
+test = test_lag_frame(df, TOP_STATIONS, N_LAGS)
+
 for station in TOP_STATIONS:
     print(f"📈 Generating current test predictions for {station} using PCA model...")
 
-    station_df = df[df["start_station_id"] == station].sort_values("hour").copy()
-    station_df = create_lag_features(station_df, N_LAGS).dropna()
+    station_test = test[test["start_station_id"] == station]
+    X_test, y_test = station_test[lag_columns(N_LAGS)], station_test["rides"]
 
-    X = station_df[[f"lag_{i}" for i in range(1, N_LAGS + 1)]]
-    y = station_df["rides"]
-    split = int(len(X) * 0.8)
-
-    X_train, X_test = X.iloc[:split], X.iloc[split:]
-    y_test = y.iloc[split:]
-
-    # Load PCA model from Hopsworks Model Registry
-    model_name = f"citibike_pca_{station}"
-    model_obj = mr.get_model(model_name, version=None)
-    model_dir = model_obj.download()
-    model = joblib.load(os.path.join(model_dir, "model.pkl"))
-
-    # Apply PCA (fit on train, transform test)
-    pca = PCA(n_components=PCA_COMPONENTS)
-    pca.fit(X_train)
-    X_test_pca = pca.transform(X_test)
-
-    y_pred = model.predict(X_test_pca)
+    # The registered pipeline carries the PCA fitted at training time
+    pipeline = load_pca_pipeline(mr, f"citibike_pca_{station}")
+    y_pred = pipeline.predict(X_test)
 
     out_df = pd.DataFrame({
-        "hour": station_df.iloc[split:]["hour"],
+        "station_id": station,
+        "hour": station_test["hour"].values,
         "actual_rides": y_test.values,
         "predicted_rides": y_pred
     })
-
-    out_file = f"{METRICS_PATH}/predictions_lgbm_pca_{station}.csv"
-    out_df.to_csv(out_file, index=False)
-    print(f"✅ Saved: {out_file}")
+    write_predictions(out_df, "predictions_lgbm_pca", loaded_model_version(f"citibike_pca_{station}"))
@@ -0,0 +1,40 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import json
+
+from src.utils.feature_store import login, read_latest_features
+from src.utils.forecasting import GlobalPredictor, recursive_forecast, station_histories
+from src.utils.model_registry import load_model, loaded_model_version
+from src.utils.prediction_store import write_predictions
+
+# ---------------- CONFIG ----------------
+MODEL_NAME = "citibike_lgbm_global"
+FUTURE_PERIODS = 168
+
+# ---------------- SETUP ----------------
+# Connect to Hopsworks
+project = login()
+fs = project.get_feature_store()
+mr = project.get_model_registry()
+
+model, model_dir = load_model(mr, MODEL_NAME)
+with open(os.path.join(model_dir, "metadata.json")) as f:
+    metadata = json.load(f)
+stations = metadata["stations"]
+n_lags = metadata["n_lags"]
+
+# Load only the latest hours needed to seed the lag window
+df = read_latest_features(fs, stations, n_rows=n_lags)
+
+# ---------------- MAIN ----------------
+histories, last_hours = station_histories(df, stations, n_lags)
+
+# Every station shares one predictor, so each horizon step is a single batched predict
+predictor = GlobalPredictor(model, stations, n_lags)
+predictors = {station_id: predictor for station_id in histories}
+
+print(f"🔮 Forecasting next {FUTURE_PERIODS} hours for {len(predictors)} stations (global model)...")
+forecast = recursive_forecast(predictors, histories, last_hours, horizon=FUTURE_PERIODS, n_lags=n_lags)
+write_predictions(forecast, "future_lgbm_global", loaded_model_version(MODEL_NAME))
@@ -1,66 +1,67 @@
+import sys
 import os
-import pandas as pd
-import numpy as np
-import joblib
-from datetime import timedelta
-import hopsworks
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import argparse
+import json
+import time
+
+from src.utils.feature_store import login, read_latest_features
+from src.utils.forecasting import (
+    LagPredictor,
+    direct_forecast,
+    recursive_forecast,
+    station_histories,
+)
+from src.utils.model_registry import load_model, loaded_model_version
+from src.utils.prediction_store import write_predictions
 
 # ---------------- CONFIG ----------------
 TOP_STATIONS = ["JC115", "HB102", "HB103"]
-METRICS_PATH = "data/metrics"
 N_LAGS = 28
 FUTURE_PERIODS = 168
 
-# ---------------- SETUP ----------------
-os.makedirs(METRICS_PATH, exist_ok=True)
+# recursive: Lag-28 model, 168 sequential steps; direct: horizon-aware model, one predict per station
+parser = argparse.ArgumentParser(description="Forecast the next week from the latest 28 hours.")
+parser.add_argument("--mode", choices=["recursive", "direct"], default="recursive")
+args = parser.parse_args()
 
+# ---------------- SETUP ----------------
 # Connect to Hopsworks
-project = hopsworks.login()
+project = login()
 fs = project.get_feature_store()
 mr = project.get_model_registry()
 
-# Load feature data
-fg = fs.get_feature_group("citibike_features_dataset", version=1)
-df = fg.read()
-
-# ---------------- HELPERS ----------------
-def create_lag_features(df, n_lags):
-    for lag in range(1, n_lags + 1):
-        df[f"lag_{lag}"] = df["rides"].shift(lag)
-    return df
+# Load only the latest hours needed to seed the lag window
+df = read_latest_features(fs, TOP_STATIONS, n_rows=N_LAGS)
 
 # ---------------- MAIN ----------------
-for station_id in TOP_STATIONS:
-    print(f"🔮 Forecasting next {FUTURE_PERIODS} hours for {station_id} (Lag-28 model)...")
-
-    station_df = df[df["start_station_id"] == station_id].sort_values("hour").copy()
-    station_df = create_lag_features(station_df, N_LAGS).dropna()
-
-    latest = station_df.iloc[-N_LAGS:].copy()
-
-    # Load model from registry
-    model_name = f"citibike_lag28_{station_id}"
-    model_obj = mr.get_model(model_name, version=None)
-    model_dir = model_obj.download()
-    model = joblib.load(os.path.join(model_dir, "model.pkl"))
-
-    predictions = []
-    last_timestamp = latest["hour"].max()
+histories, last_hours = station_histories(df, TOP_STATIONS, N_LAGS)
 
-    for _ in range(FUTURE_PERIODS):
-        last_timestamp += timedelta(hours=1)
-        last_lags = latest.tail(N_LAGS)["rides"].values[::-1]
-        input_df = pd.DataFrame([last_lags], columns=[f"lag_{i}" for i in range(1, N_LAGS + 1)])
-        pred = model.predict(input_df)[0]
+start = time.perf_counter()
+if args.mode == "direct":
+    models = {}
+    for station_id in histories:
+        model, model_dir = load_model(mr, f"citibike_direct_{station_id}")
+        with open(os.path.join(model_dir, "metadata.json")) as f:
+            trained_horizon = json.load(f)["horizon"]
+        if trained_horizon < FUTURE_PERIODS:
+            raise ValueError(f"citibike_direct_{station_id} covers {trained_horizon}h, need {FUTURE_PERIODS}h")
+        models[station_id] = model
 
-        predictions.append({
-            "hour": last_timestamp,
-            "predicted_rides": pred
-        })
+    print(f"🔮 Forecasting next {FUTURE_PERIODS} hours for {list(models)} (direct model)...")
+    forecast = direct_forecast(models, histories, last_hours, horizon=FUTURE_PERIODS, n_lags=N_LAGS)
+    prefix, registry_prefix = "future_lgbm_direct", "citibike_direct"
+else:
+    predictors = {}
+    for station_id in histories:
+        # Load model from registry (reuses the artifact current_prediction_lag28.py cached)
+        model, _ = load_model(mr, f"citibike_lag28_{station_id}")
+        predictors[station_id] = LagPredictor(model, n_lags=N_LAGS)
 
-        latest = pd.concat([latest, pd.DataFrame([{"hour": last_timestamp, "rides": pred}])], ignore_index=True)
+    print(f"🔮 Forecasting next {FUTURE_PERIODS} hours for {list(predictors)} (Lag-28 model)...")
+    forecast = recursive_forecast(predictors, histories, last_hours, horizon=FUTURE_PERIODS, n_lags=N_LAGS)
+    prefix, registry_prefix = "future_lgbm_lag28", "citibike_lag28"
 
-    out_df = pd.DataFrame(predictions)
-    out_file = f"{METRICS_PATH}/future_lgbm_lag28_{station_id}.csv"
-    out_df.to_csv(out_file, index=False)
-    print(f"✅ Saved: {out_file}")
+print(f"⏱️ {args.mode} forecast took {time.perf_counter() - start:.3f}s")
+write_predictions(forecast, prefix, {s: loaded_model_version(f"{registry_prefix}_{s}") for s in histories})
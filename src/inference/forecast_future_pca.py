@@ -1,75 +1,38 @@
+import sys
 import os
-import pandas as pd
-import numpy as np
-import joblib
-from datetime import timedelta
-from sklearn.decomposition import PCA
-import hopsworks
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.utils.feature_store import login, read_latest_features
+from src.utils.forecasting import (
+    ProjectionPredictor,
+    recursive_forecast,
+    station_histories,
+)
+from src.utils.model_registry import load_pca_pipeline, loaded_model_version
+from src.utils.prediction_store import write_predictions
 
 # ---------------- CONFIG ----------------
 TOP_STATIONS = ["JC115", "HB102", "HB103"]
-METRICS_PATH = "data/metrics"
 N_LAGS = 28
 FUTURE_PERIODS = 168
-PCA_COMPONENTS = 10
 
 # ---------------- SETUP ----------------
-os.makedirs(METRICS_PATH, exist_ok=True)
-
 # Connect to Hopsworks
-project = hopsworks.login()
+project = login()
 fs = project.get_feature_store()
 mr = project.get_model_registry()
 
-# Load feature data
-fg = fs.get_feature_group("citibike_features_dataset", version=1)
-df = fg.read()
-
-# ---------------- HELPERS ----------------
-def create_lag_features(df, n_lags):
-    for lag in range(1, n_lags + 1):
-        df[f"lag_{lag}"] = df["rides"].shift(lag)
-    return df
+# Only the last N_LAGS hours per station seed the forecast; PCA is no longer refit
+df = read_latest_features(fs, TOP_STATIONS, n_rows=N_LAGS)
 
 # ---------------- MAIN ----------------
-for station_id in TOP_STATIONS:
-    print(f"🔮 Forecasting next {FUTURE_PERIODS} hours for {station_id} (PCA model)...")
-
-    station_df = df[df["start_station_id"] == station_id].sort_values("hour").copy()
-    station_df = create_lag_features(station_df, N_LAGS).dropna()
-
-    latest = station_df.iloc[-N_LAGS:].copy()
-
-    # Load model from registry
-    model_name = f"citibike_pca_{station_id}"
-    model_obj = mr.get_model(model_name, version=None)
-    model_dir = model_obj.download()
-    model = joblib.load(os.path.join(model_dir, "model.pkl"))
-
-    # Fit PCA on full lag features
-    all_features = [f"lag_{i}" for i in range(1, N_LAGS + 1)]
-    pca = PCA(n_components=PCA_COMPONENTS)
-    X_all = station_df[all_features]
-    pca.fit(X_all)
-
-    predictions = []
-    last_timestamp = latest["hour"].max()
-
-    for _ in range(FUTURE_PERIODS):
-        last_timestamp += timedelta(hours=1)
-        last_lags = latest.tail(N_LAGS)["rides"].values[::-1]
-        input_df = pd.DataFrame([last_lags], columns=all_features)
-        input_pca = pca.transform(input_df)
-        pred = model.predict(input_pca)[0]
-
-        predictions.append({
-            "hour": last_timestamp,
-            "predicted_rides": pred
-        })
+histories, last_hours = station_histories(df, TOP_STATIONS, N_LAGS)
 
-        latest = pd.concat([latest, pd.DataFrame([{"hour": last_timestamp, "rides": pred}])], ignore_index=True)
+predictors = {
+    station_id: ProjectionPredictor(load_pca_pipeline(mr, f"citibike_pca_{station_id}"), n_lags=N_LAGS)
+    for station_id in histories
+}
 
-    out_df = pd.DataFrame(predictions)
-    out_file = f"{METRICS_PATH}/future_lgbm_pca_{station_id}.csv"
-    out_df.to_csv(out_file, index=False)
-    print(f"✅ Saved: {out_file}")
+print(f"🔮 Forecasting next {FUTURE_PERIODS} hours for {list(predictors)} (PCA model)...")
+forecast = recursive_forecast(predictors, histories, last_hours, horizon=FUTURE_PERIODS, n_lags=N_LAGS)
+write_predictions(forecast, "future_lgbm_pca", {s: loaded_model_version(f"citibike_pca_{s}") for s in predictors})
@@ -1,73 +1,35 @@
+import sys
 import os
-import pandas as pd
-import numpy as np
-import joblib
-from datetime import timedelta
-import hopsworks
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.utils.feature_store import login, read_latest_features
+from src.utils.forecasting import LagPredictor, recursive_forecast, station_histories
+from src.utils.model_registry import load_model_with_manifest, loaded_model_version
+from src.utils.prediction_store import write_predictions
 
 # ---------------- CONFIG ----------------
 TOP_STATIONS = ["JC115", "HB102", "HB103"]
-METRICS_PATH = "data/metrics"
 N_LAGS = 28
 FUTURE_PERIODS = 168
-TOP_K = 10
 
 # ---------------- SETUP ----------------
-os.makedirs(METRICS_PATH, exist_ok=True)
-
 # Connect to Hopsworks
-project = hopsworks.login()
+project = login()
 fs = project.get_feature_store()
 mr = project.get_model_registry()
 
-# Load feature data
-fg = fs.get_feature_group("citibike_features_dataset", version=1)
-df = fg.read()
-
-# ---------------- HELPERS ----------------
-def create_lag_features(df, n_lags):
-    for lag in range(1, n_lags + 1):
-        df[f"lag_{lag}"] = df["rides"].shift(lag)
-    return df
+# Load only the latest hours needed to seed the lag window
+df = read_latest_features(fs, TOP_STATIONS, n_rows=N_LAGS)
 
 # ---------------- MAIN ----------------
-for station_id in TOP_STATIONS:
-    print(f"🔮 Forecasting next {FUTURE_PERIODS} hours for {station_id} (TopK model)...")
-
-    station_df = df[df["start_station_id"] == station_id].sort_values("hour").copy()
-    station_df = create_lag_features(station_df, N_LAGS).dropna()
-
-    latest = station_df.iloc[-N_LAGS:].copy()
-
-    # Load model from registry
-    model_name = f"citibike_topk_{station_id}"
-    model_obj = mr.get_model(model_name, version=None)
-    model_dir = model_obj.download()
-    model = joblib.load(os.path.join(model_dir, "model.pkl"))
-
-    importances = model.feature_importances_
-    all_features = [f"lag_{i}" for i in range(1, N_LAGS + 1)]
-    top_k_indices = np.argsort(importances)[-TOP_K:]
-    top_k_features = [all_features[i] for i in top_k_indices]
-
-    predictions = []
-    last_timestamp = latest["hour"].max()
-
-    for _ in range(FUTURE_PERIODS):
-        last_timestamp += timedelta(hours=1)
-        last_lags = latest.tail(N_LAGS)["rides"].values[::-1]
-        input_df = pd.DataFrame([last_lags], columns=all_features)
-        input_df = input_df[top_k_features]
-        pred = model.predict(input_df)[0]
-
-        predictions.append({
-            "hour": last_timestamp,
-            "predicted_rides": pred
-        })
+histories, last_hours = station_histories(df, TOP_STATIONS, N_LAGS)
 
-        latest = pd.concat([latest, pd.DataFrame([{"hour": last_timestamp, "rides": pred}])], ignore_index=True)
+predictors = {}
+for station_id in histories:
+    # The manifest lists the selected lags, so each step gathers only those columns
+    model, manifest = load_model_with_manifest(mr, f"citibike_topk_{station_id}")
+    predictors[station_id] = LagPredictor(model, lags=manifest.lags)
 
-    out_df = pd.DataFrame(predictions)
-    out_file = f"{METRICS_PATH}/future_lgbm_topk_{station_id}.csv"
-    out_df.to_csv(out_file, index=False)
-    print(f"✅ Saved: {out_file}")
+print(f"🔮 Forecasting next {FUTURE_PERIODS} hours for {list(predictors)} (TopK model)...")
+forecast = recursive_forecast(predictors, histories, last_hours, horizon=FUTURE_PERIODS, n_lags=N_LAGS)
+write_predictions(forecast, "future_lgbm_topk", {s: loaded_model_version(f"citibike_topk_{s}") for s in predictors})
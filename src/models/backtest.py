@@ -0,0 +1,186 @@
+"""
+Walk-forward (rolling-origin) backtest of the forecasting models.
+
+Features are read and lagged once per station (build_station_datasets). Each
+fold takes a forecast origin, fits on the rows before it (expanding window, or
+the last --window rows) and forecasts the next --horizon hours exactly as
+inference would. Train and test rows are slices of the shared lag matrix, so
+no fold re-reads or re-lags data. (model, station, fold) tasks run in a
+process pool.
+
+Writes data/metrics/backtest_fold_mae.csv (one row per model, station and fold)
+and data/metrics/backtest_horizon_mae.csv (MAE per model, fold and horizon step).
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from src.models import strategies
+from src.models.strategies import N_LAGS, build_station_datasets, direct_training_rows
+from src.utils.feature_store import RIDE_COLUMNS, login, read_features
+from src.utils.forecasting import LagPredictor, direct_forecast, recursive_forecast
+
+TOP_STATIONS = ["JC115", "HB102", "HB103"]
+RESULTS_DIR = "data/metrics"
+N_FOLDS = 5
+HORIZON = 168
+
+BACKTEST_MODELS = {}
+
+
+def backtest_model(name):
+    """Register fn(data, start, origin, horizon) -> `horizon` forecasts for the hours from `origin`."""
+    def decorator(fn):
+        BACKTEST_MODELS[name] = fn
+        return fn
+    return decorator
+
+
+def _seed(data, origin):
+    """Recursive/direct forecaster inputs for a forecast starting at row `origin`."""
+    history = {data.station_id: data.y.to_numpy()[origin - N_LAGS:origin]}
+    last_hour = {data.station_id: data.hours.iloc[origin - 1]}
+    return history, last_hour
+
+
+@backtest_model("naive")
+def backtest_naive(data, start, origin, horizon):
+    """Repeat the last observed hour (the naive lag-1 baseline, run recursively)."""
+    return np.full(horizon, float(data.y.iloc[origin - 1]))
+
+
+@backtest_model("lag28")
+def backtest_lag28(data, start, origin, horizon):
+    model = strategies._lgbm()
+    model.fit(data.X.iloc[start:origin], data.y.iloc[start:origin])
+    history, last_hour = _seed(data, origin)
+    forecast = recursive_forecast({data.station_id: LagPredictor(model, n_lags=N_LAGS)}, history, last_hour,
+                                  horizon=horizon, n_lags=N_LAGS)
+    return forecast["predicted_rides"].to_numpy()
+
+
+@backtest_model("direct")
+def backtest_direct(data, start, origin, horizon):
+    # Only origins whose whole horizon ends before the fold origin are training rows
+    origins = np.arange(start, origin - horizon + 1, strategies.DIRECT_ORIGIN_STRIDE)
+    X_train, y_train = direct_training_rows(data, origins, horizon)
+    model = strategies._lgbm()
+    model.fit(X_train, y_train)
+    history, last_hour = _seed(data, origin)
+    forecast = direct_forecast({data.station_id: model}, history, last_hour, horizon=horizon, n_lags=N_LAGS)
+    return forecast["predicted_rides"].to_numpy()
+
+
+def fold_origins(n_rows, n_folds=N_FOLDS, horizon=HORIZON, step=None, min_train=None):
+    """
+    Row indices of the forecast origins, oldest first. The last fold ends at the
+    last row; earlier folds step back `step` rows (default: one horizon, so test
+    windows do not overlap). Folds without `min_train` rows before them are dropped.
+    """
+    step = step or horizon
+    min_train = min_train or 2 * horizon
+    origins = [n_rows - horizon - step * k for k in range(n_folds)][::-1]
+    return [o for o in origins if o >= min_train]
+
+
+# Station datasets handed to each worker process once, instead of with every task
+_DATASETS = None
+
+def _init_worker(datasets, lgbm_threads):
+    global _DATASETS
+    _DATASETS = datasets
+    strategies.LGBM_N_JOBS = lgbm_threads
+
+def _run_fold(model_name, station_id, fold, origin, horizon, window):
+    data = _DATASETS[station_id]
+    start = max(0, origin - window) if window else 0
+    y_pred = BACKTEST_MODELS[model_name](data, start, origin, horizon)
+    y_true = data.y.to_numpy()[origin:origin + horizon]
+    return {
+        "model": model_name,
+        "station_id": station_id,
+        "fold": fold,
+        "origin_hour": data.hours.iloc[origin],
+        "train_rows": origin - start,
+        "abs_errors": np.abs(y_pred - y_true),
+    }
+
+def run_backtest(datasets, models, n_folds=N_FOLDS, horizon=HORIZON, step=None, window=None, workers=None):
+    """Run every (model, station, fold) task; returns (fold table, horizon table)."""
+    tasks = [
+        (model_name, station_id, fold, origin, horizon, window)
+        for model_name in models
+        for station_id, data in datasets.items()
+        for fold, origin in enumerate(fold_origins(len(data.y), n_folds, horizon, step))
+    ]
+    workers = workers or min(len(tasks), os.cpu_count() or 1)
+    lgbm_threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🧪 Backtesting {len(tasks)} folds ({', '.join(models)}) with {workers} worker(s)...")
+
+    results = []
+    if workers == 1:
+        _init_worker(datasets, -1)
+        results = [_run_fold(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(datasets, lgbm_threads)) as pool:
+            futures = [pool.submit(_run_fold, *task) for task in tasks]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                print(f"✅ {result['model']} / {result['station_id']} fold {result['fold']}: "
+                      f"MAE {result['abs_errors'].mean():.3f}")
+
+    keys = ["model", "station_id", "fold", "origin_hour", "train_rows"]
+    fold_mae = pd.DataFrame(
+        [{**{k: r[k] for k in keys}, "mae": float(r["abs_errors"].mean())} for r in results]
+    ).sort_values(["model", "station_id", "fold"], ignore_index=True)
+
+    errors = pd.DataFrame({
+        "model": np.repeat([r["model"] for r in results], horizon),
+        "fold": np.repeat([r["fold"] for r in results], horizon),
+        "horizon": np.tile(np.arange(1, horizon + 1), len(results)),
+        "abs_error": np.concatenate([r["abs_errors"] for r in results]) if results else [],
+    })
+    horizon_mae = (
+        errors.groupby(["model", "fold", "horizon"])["abs_error"].mean()
+        .rename("mae").reset_index()
+    )
+    return fold_mae, horizon_mae
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest over the per-station hourly series.")
+    parser.add_argument("--models", nargs="+", choices=sorted(BACKTEST_MODELS), default=list(BACKTEST_MODELS))
+    parser.add_argument("--folds", type=int, default=N_FOLDS)
+    parser.add_argument("--horizon", type=int, default=HORIZON)
+    parser.add_argument("--step", type=int, default=None, help="hours between fold origins (default: horizon)")
+    parser.add_argument("--window", type=int, default=None, help="train on only the last N rows (default: expanding)")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (1 = run inline)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+
+    # Read and lag the data once; every fold is an index range into these matrices
+    project = login()
+    fs = project.get_feature_store()
+    df = read_features(fs, stations=TOP_STATIONS, columns=RIDE_COLUMNS)
+    datasets = build_station_datasets(df, TOP_STATIONS)
+
+    fold_mae, horizon_mae = run_backtest(
+        datasets, args.models, args.folds, args.horizon, args.step, args.window, args.workers
+    )
+    fold_mae.to_csv(f"{RESULTS_DIR}/backtest_fold_mae.csv", index=False)
+    horizon_mae.to_csv(f"{RESULTS_DIR}/backtest_horizon_mae.csv", index=False)
+
+    print("\nMean MAE per model across stations and folds:")
+    print(fold_mae.groupby("model")["mae"].agg(["mean", "std", "count"]))
+
+if __name__ == "__main__":
+    main()
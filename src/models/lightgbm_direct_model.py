@@ -0,0 +1,10 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+# Direct multi-horizon LightGBM (horizon as a feature). The training logic lives in strategies.py;
+# this script runs only this strategy through the shared driver (train_all.py runs all of them at once).
+from src.models.train_all import main
+
+if __name__ == "__main__":
+    main(["--strategies", "direct"] + sys.argv[1:])
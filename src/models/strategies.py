@@ -0,0 +1,414 @@
+"""
+Per-station training strategies shared by train_all.py and the per-model scripts.
+
+Each strategy takes a prepared StationData (lag matrix plus the shared 80/20
+split) and fits, saves, logs and evaluates one model. It returns a summary row;
+an optional "registry" entry names a model directory for train_all.py to
+register. Cross-station strategies (per_station=False) take every station's
+StationData at once and return one summary row per station. Register new
+strategies with @register_strategy; train_all.py picks them up by name.
+"""
+import json
+import os
+from dataclasses import dataclass
+from typing import Callable
+
+import joblib
+import numpy as np
+import pandas as pd
+from lightgbm import LGBMRegressor
+from sklearn.decomposition import PCA
+from sklearn.dummy import DummyRegressor
+from sklearn.metrics import mean_absolute_error
+from sklearn.pipeline import Pipeline
+
+from src.features.hourly_grid import dense_hourly_grid, first_observed_index, grid_to_frame
+from src.utils.feature_manifest import FeatureManifest
+from src.utils.forecasting import (
+    GLOBAL_CATEGORICAL_FEATURES, direct_feature_columns, direct_feature_matrix, global_feature_frame, lag_columns
+)
+from src.utils.mlflow_logger import log_model_to_mlflow
+
+RESULTS_DIR = "data/metrics"
+MODELS_DIR = "trained_models"
+N_LAGS = 28
+TRAIN_FRACTION = 0.8
+TOP_K = 10
+N_COMPONENTS = 10
+DIRECT_HORIZON = 168
+# Every 7th hour is a training origin for the direct model; 7 is coprime with 24,
+# so origins still cover every hour of the day at 1/7 of the rows
+DIRECT_ORIGIN_STRIDE = 7
+
+# Threads per LightGBM fit; train_all.py lowers this when several strategies run in parallel
+LGBM_N_JOBS = -1
+# station_id -> tuned LGBMRegressor params (tune_lgbm.py); train_all.py --tune fills this
+LGBM_PARAMS = {}
+
+
+@dataclass
+class StationData:
+    """One station's lag matrix and target, with the train/test split every strategy shares."""
+    station_id: str
+    hours: pd.Series
+    X: pd.DataFrame
+    y: pd.Series
+    split: int
+
+    @property
+    def X_train(self):
+        return self.X.iloc[:self.split]
+
+    @property
+    def X_test(self):
+        return self.X.iloc[self.split:]
+
+    @property
+    def y_train(self):
+        return self.y.iloc[:self.split]
+
+    @property
+    def y_test(self):
+        return self.y.iloc[self.split:]
+
+    @property
+    def test_hours(self):
+        return self.hours.iloc[self.split:]
+
+
+@dataclass
+class Strategy:
+    name: str
+    train: Callable
+    summary_file: str
+    per_station: bool = True
+
+
+STRATEGIES = {}
+
+
+def register_strategy(name, summary_file, per_station=True):
+    """Add a training function to the registry under `name`."""
+    def decorator(fn):
+        STRATEGIES[name] = Strategy(name, fn, summary_file, per_station)
+        return fn
+    return decorator
+
+
+def build_station_datasets(df, stations=None, n_lags=N_LAGS, train_fraction=TRAIN_FRACTION):
+    """Build every station's (all stations in df by default) lag matrix in one pass over the dense hourly grid."""
+    grid_stations, hours, counts = dense_hourly_grid(df, stations=stations)
+    frame = grid_to_frame(grid_stations, hours, counts, n_lags, first_observed_index(counts) + n_lags)
+
+    datasets = {}
+    for station_id, station_frame in frame.groupby("start_station_id", sort=False):
+        station_frame = station_frame.reset_index(drop=True)
+        datasets[station_id] = StationData(
+            station_id=station_id,
+            hours=station_frame["hour"],
+            X=station_frame[lag_columns(n_lags)],
+            y=station_frame["rides"],
+            split=int(len(station_frame) * train_fraction),
+        )
+    return datasets
+
+
+def _lgbm(station_id=None):
+    return LGBMRegressor(random_state=42, n_jobs=LGBM_N_JOBS, **LGBM_PARAMS.get(station_id, {}))
+
+
+def _save_predictions(data, y_pred, name):
+    pd.DataFrame({
+        "hour": data.test_hours,
+        "actual_rides": data.y_test,
+        "predicted_rides": y_pred
+    }).to_csv(f"{RESULTS_DIR}/predictions_{name}_{data.station_id}.csv", index=False)
+
+
+@register_strategy("naive", "baseline_mae_summary.csv")
+def train_naive(data):
+    """Naive lag-1 baseline: predict the previous hour's rides."""
+    X_train = data.X_train[["lag_1"]].rename(columns={"lag_1": "predicted_rides"})
+    X_test = data.X_test[["lag_1"]].rename(columns={"lag_1": "predicted_rides"})
+
+    dummy_model = DummyRegressor(strategy="mean")
+    dummy_model.fit(X_train, data.y_train)
+
+    mae = mean_absolute_error(data.y_test, X_test["predicted_rides"])
+
+    _save_predictions(data, X_test["predicted_rides"], "naive")
+    joblib.dump(dummy_model, f"{MODELS_DIR}/naive_model_{data.station_id}.pkl")
+
+    log_model_to_mlflow(
+        model=dummy_model,
+        input_data=X_test,
+        experiment_name="citibike-baseline",
+        metric_name="mae",
+        model_name="BaselineModelNaiveLag",
+        score=float(mae),
+        params={"station_id": data.station_id, "strategy": "naive_lag_1"},
+    )
+
+    return {"station_id": data.station_id, "model": "naive_lag_1", "mae": float(mae)}
+
+
+@register_strategy("lag28", "lgbm_lag28_mae_summary.csv")
+def train_lag28(data):
+    """LightGBM on all 28 lags."""
+    model = _lgbm(data.station_id)
+    model.fit(data.X_train, data.y_train)
+    y_pred = model.predict(data.X_test)
+    mae = mean_absolute_error(data.y_test, y_pred)
+
+    model_dir = f"{MODELS_DIR}/lag28_model_{data.station_id}"
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(model, f"{model_dir}/model.pkl")
+
+    log_model_to_mlflow(
+        model=model,
+        input_data=data.X_test,
+        experiment_name="citibike-lgbm-lag28",
+        metric_name="mae",
+        model_name=f"LGBMLag28_{data.station_id}",
+        score=float(mae),
+        params={
+            "station_id": data.station_id,
+            "strategy": "lgbm_all_lags",
+            "n_lags": int(N_LAGS)
+        }
+    )
+
+    _save_predictions(data, y_pred, "lgbm_lag28")
+    return {
+        "station_id": data.station_id,
+        "model": "LGBMLag28",
+        "strategy": "lgbm_all_lags",
+        "mae": float(mae),
+        "registry": {"name": f"citibike_lag28_{data.station_id}", "model_dir": model_dir},
+    }
+
+
+@register_strategy("topk", "lgbm_topk_mae_summary.csv")
+def train_topk(data):
+    """LightGBM on the TOP_K most important lags of a first full-lag fit."""
+    full_features = list(data.X.columns)
+
+    # First model to get top-k important features
+    temp_model = _lgbm()
+    temp_model.fit(data.X_train, data.y_train)
+    top_k_idx = np.argsort(temp_model.feature_importances_)[-TOP_K:]
+    top_k_features = [full_features[i] for i in top_k_idx]
+
+    # Second model trained on top-k features
+    model = _lgbm(data.station_id)
+    model.fit(data.X_train[top_k_features], data.y_train)
+    y_pred = model.predict(data.X_test[top_k_features])
+    mae = mean_absolute_error(data.y_test, y_pred)
+
+    # The selected columns travel with the model so inference never re-derives them
+    model_dir = f"{MODELS_DIR}/topk_model_{data.station_id}"
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(model, f"{model_dir}/model.pkl")
+    FeatureManifest(
+        features=top_k_features, n_lags=N_LAGS, selection="top_k_importance", params={"top_k": int(TOP_K)}
+    ).save(model_dir)
+
+    log_model_to_mlflow(
+        model=model,
+        input_data=data.X_test[top_k_features],
+        experiment_name="citibike-lgbm-topk",
+        metric_name="mae",
+        model_name=f"LGBMTopK_{data.station_id}",
+        score=float(mae),
+        params={
+            "station_id": data.station_id,
+            "strategy": "lgbm_top_k",
+            "top_k": int(TOP_K)
+        }
+    )
+
+    _save_predictions(data, y_pred, "lgbm_topk")
+    return {
+        "station_id": data.station_id,
+        "model": "LGBMTopK",
+        "strategy": "lgbm_top_k",
+        "mae": float(mae),
+        "registry": {"name": f"citibike_topk_{data.station_id}", "model_dir": model_dir},
+    }
+
+
+@register_strategy("pca", "lgbm_pca_mae_summary.csv")
+def train_pca(data):
+    """LightGBM on N_COMPONENTS principal components of the 28 lags, packaged as one pipeline."""
+    pipeline = Pipeline([
+        ("pca", PCA(n_components=N_COMPONENTS)),
+        ("model", _lgbm()),
+    ])
+    pipeline.fit(data.X_train, data.y_train)
+    y_pred = pipeline.predict(data.X_test)
+    mae = mean_absolute_error(data.y_test, y_pred)
+
+    explained_variance = float(round(sum(pipeline.named_steps["pca"].explained_variance_ratio_) * 100, 2))
+
+    # The transformer and regressor ship together so inference never refits PCA
+    model_dir = f"{MODELS_DIR}/pca_model_{data.station_id}"
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(pipeline, f"{model_dir}/model.pkl")
+
+    log_model_to_mlflow(
+        model=pipeline,
+        input_data=data.X_test,
+        experiment_name="citibike-lgbm-pca",
+        metric_name="mae",
+        model_name=f"LGBMPCA_{data.station_id}",
+        score=float(mae),
+        params={
+            "station_id": data.station_id,
+            "strategy": "lgbm_pca_reduction",
+            "n_components": int(N_COMPONENTS),
+            "explained_variance": explained_variance
+        }
+    )
+
+    _save_predictions(data, y_pred, "lgbm_pca")
+    return {
+        "station_id": data.station_id,
+        "model": "LGBMPCA",
+        "strategy": "lgbm_pca_reduction",
+        "mae": float(mae),
+        "explained_variance": explained_variance,
+        "registry": {"name": f"citibike_pca_{data.station_id}", "model_dir": model_dir},
+    }
+
+
+def direct_training_rows(data, origins, horizon=DIRECT_HORIZON):
+    """Stack every (origin row, horizon) pair into direct-model features and targets."""
+    horizons = np.arange(1, horizon + 1)
+    X = direct_feature_matrix(data.X.to_numpy()[origins], data.hours.iloc[origins], horizons)
+    y = data.y.to_numpy()[origins[:, None] + horizons - 1].ravel()
+    return pd.DataFrame(X, columns=direct_feature_columns(data.X.shape[1])), y
+
+
+@register_strategy("direct", "lgbm_direct_mae_summary.csv")
+def train_direct(data):
+    """
+    One LightGBM model for all DIRECT_HORIZON steps, with the horizon as a feature,
+    so a week-ahead forecast is a single predict instead of 168 sequential ones.
+    """
+    columns = direct_feature_columns(N_LAGS)
+
+    # Train origins whose whole horizon stays inside the training slice; test origins after it
+    train_origins = np.arange(0, data.split - DIRECT_HORIZON + 1, DIRECT_ORIGIN_STRIDE)
+    test_origins = np.arange(data.split, len(data.y) - DIRECT_HORIZON + 1, DIRECT_ORIGIN_STRIDE)
+    X_train, y_train = direct_training_rows(data, train_origins)
+
+    model = _lgbm()
+    model.fit(X_train, y_train)
+
+    # Horizon 1 on every test row is comparable with the one-step MAE of the other strategies
+    X_h1 = pd.DataFrame(direct_feature_matrix(data.X_test.to_numpy(), data.test_hours, [1]), columns=columns)
+    y_pred = model.predict(X_h1)
+    mae = mean_absolute_error(data.y_test, y_pred)
+
+    mae_all_horizons = None
+    if len(test_origins):
+        X_test, y_test = direct_training_rows(data, test_origins)
+        mae_all_horizons = float(mean_absolute_error(y_test, model.predict(X_test)))
+
+    model_dir = f"{MODELS_DIR}/direct_model_{data.station_id}"
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(model, f"{model_dir}/model.pkl")
+    with open(f"{model_dir}/metadata.json", "w") as f:
+        json.dump({"n_lags": N_LAGS, "horizon": DIRECT_HORIZON, "features": columns}, f, indent=2)
+
+    log_model_to_mlflow(
+        model=model,
+        input_data=X_h1,
+        experiment_name="citibike-lgbm-direct",
+        metric_name="mae",
+        model_name=f"LGBMDirect_{data.station_id}",
+        score=float(mae),
+        params={
+            "station_id": data.station_id,
+            "strategy": "lgbm_direct_horizon",
+            "n_lags": int(N_LAGS),
+            "horizon": int(DIRECT_HORIZON),
+            "origin_stride": int(DIRECT_ORIGIN_STRIDE)
+        }
+    )
+
+    _save_predictions(data, y_pred, "lgbm_direct")
+    return {
+        "station_id": data.station_id,
+        "model": "LGBMDirect",
+        "strategy": "lgbm_direct_horizon",
+        "mae": float(mae),
+        "mae_all_horizons": mae_all_horizons,
+        "registry": {"name": f"citibike_direct_{data.station_id}", "model_dir": model_dir},
+    }
+
+
+@register_strategy("global", "lgbm_global_mae_summary.csv", per_station=False)
+def train_global(datasets):
+    """
+    One LightGBM model across every station, with station, hour of day and day of
+    week as categorical features, fitted on each station's shared training slice.
+    """
+    stations = list(datasets)
+    station_codes = {s: i for i, s in enumerate(stations)}
+    parts = list(datasets.values())
+
+    X = global_feature_frame(
+        np.vstack([data.X.to_numpy() for data in parts]),
+        np.concatenate([np.repeat(data.station_id, len(data.y)) for data in parts]),
+        pd.concat([data.hours for data in parts], ignore_index=True),
+        station_codes,
+        N_LAGS,
+    )
+    y = np.concatenate([data.y.to_numpy() for data in parts])
+    train = np.concatenate([np.arange(len(data.y)) < data.split for data in parts])
+
+    model = _lgbm()
+    model.fit(X[train], y[train], categorical_feature=GLOBAL_CATEGORICAL_FEATURES)
+    X_test = X[~train]
+    y_pred = model.predict(X_test)
+    mae = mean_absolute_error(y[~train], y_pred)
+
+    # One artifact serves every station; the station order defines the station codes
+    model_dir = f"{MODELS_DIR}/lgbm_global"
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(model, f"{model_dir}/model.pkl")
+    with open(f"{model_dir}/metadata.json", "w") as f:
+        json.dump({"stations": stations, "n_lags": N_LAGS, "features": list(X.columns)}, f, indent=2)
+
+    log_model_to_mlflow(
+        model=model,
+        input_data=X_test,
+        experiment_name="citibike-lgbm-global",
+        metric_name="mae",
+        model_name="LGBMGlobal",
+        score=float(mae),
+        params={
+            "strategy": "lgbm_global",
+            "n_lags": int(N_LAGS),
+            "n_stations": len(stations)
+        }
+    )
+
+    rows = []
+    test_sizes = [len(data.y) - data.split for data in parts]
+    for data, station_pred in zip(parts, np.split(y_pred, np.cumsum(test_sizes)[:-1])):
+        _save_predictions(data, station_pred, "lgbm_global")
+        rows.append({
+            "station_id": data.station_id,
+            "model": "LGBMGlobal",
+            "strategy": "lgbm_global",
+            "mae": float(mean_absolute_error(data.y_test, station_pred)),
+        })
+    # The single model is registered once, with the MAE over all stations
+    rows[0]["registry"] = {
+        "name": "citibike_lgbm_global", "model_dir": model_dir, "metrics": {"mae": float(mae)},
+        "description": "Global LightGBM model across all stations",
+    }
+    print(f"✅ Global model trained on {len(stations)} stations, overall MAE {mae:.3f}")
+    return rows
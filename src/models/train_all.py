@@ -0,0 +1,125 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from src.models import strategies
+from src.models.strategies import STRATEGIES, build_station_datasets
+from src.models.tune_lgbm import load_tuned_params, save_tuned_params, tune
+from src.utils.feature_store import RIDE_COLUMNS, login, read_features
+from src.utils.mlflow_logger import flush_mlflow_logging, set_mlflow_tracking
+from src.utils.model_registry import register_model
+
+TOP_STATIONS = ["JC115", "HB102", "HB103"]
+
+# Station datasets handed to each worker process once, instead of with every task
+_DATASETS = None
+
+def _init_worker(datasets, lgbm_threads, lgbm_params=None):
+    global _DATASETS
+    _DATASETS = datasets
+    strategies.LGBM_N_JOBS = lgbm_threads
+    strategies.LGBM_PARAMS = lgbm_params or {}
+    set_mlflow_tracking()
+
+def _run_task(name, station_id):
+    # Cross-station strategies run as one task (station_id None) over every dataset
+    if station_id is None:
+        return name, STRATEGIES[name].train(_DATASETS)
+    return name, STRATEGIES[name].train(_DATASETS[station_id])
+
+def _store(rows, name, station_id, result):
+    if station_id is None:
+        rows[name].update((row["station_id"], row) for row in result)
+    else:
+        rows[name][station_id] = result
+
+def run_strategies(datasets, names, workers=None, lgbm_params=None, stations=None):
+    """
+    Train every (strategy, station) pair for `stations` (all datasets by default),
+    and each cross-station strategy once over all datasets, in a process pool
+    unless workers == 1. Returns {strategy name: [summary rows in station order]}.
+    """
+    stations = list(datasets) if stations is None else list(stations)
+    # Cross-station fits are the longest tasks, so they are queued first
+    tasks = [(name, None) for name in names if not STRATEGIES[name].per_station]
+    tasks += [(name, station_id) for name in names if STRATEGIES[name].per_station for station_id in stations]
+    workers = workers or min(len(tasks), os.cpu_count() or 1)
+    lgbm_threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🏋️ Training {len(tasks)} models ({', '.join(names)}) with {workers} worker(s)...")
+
+    rows = {name: {} for name in names}
+    if workers == 1:
+        _init_worker(datasets, -1, lgbm_params)
+        for name, station_id in tasks:
+            _store(rows, name, station_id, _run_task(name, station_id)[1])
+    else:
+        # Runs queued in this process (e.g. by tune()) must not be left to forked workers
+        flush_mlflow_logging()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(datasets, lgbm_threads, lgbm_params)) as pool:
+            futures = {pool.submit(_run_task, name, station_id): station_id for name, station_id in tasks}
+            for future in as_completed(futures):
+                name, result = future.result()
+                _store(rows, name, futures[future], result)
+                if futures[future] is not None:
+                    print(f"✅ {name} / {futures[future]}: MAE {result['mae']:.3f}")
+
+    return {name: [by_station[s] for s in datasets if s in by_station] for name, by_station in rows.items()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train all model families from one feature read.")
+    parser.add_argument("--strategies", nargs="+", choices=sorted(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (1 = run inline)")
+    parser.add_argument("--tune", action="store_true", help="search LightGBM params per station first")
+    parser.add_argument("--tuned-params", action="store_true", help="reuse params saved by an earlier --tune")
+    args = parser.parse_args(argv)
+
+    os.makedirs(strategies.RESULTS_DIR, exist_ok=True)
+    os.makedirs(strategies.MODELS_DIR, exist_ok=True)
+
+    # Load features and build the shared lag matrices once for all strategies. A
+    # cross-station strategy (global) trains on every station, so the read widens to all.
+    project = login()
+    fs = project.get_feature_store()
+    cross_station = any(not STRATEGIES[name].per_station for name in args.strategies)
+    stations = None if cross_station else TOP_STATIONS
+    df = read_features(fs, stations=stations, columns=RIDE_COLUMNS)
+    datasets = build_station_datasets(df, stations)
+    top_stations = [s for s in TOP_STATIONS if s in datasets]
+
+    # Tuned params apply to the LightGBM strategies on the lag features (lag28, topk)
+    lgbm_params = {}
+    if args.tune:
+        set_mlflow_tracking()
+        lgbm_params = tune({s: datasets[s] for s in top_stations}, workers=args.workers)
+        save_tuned_params(lgbm_params)
+    elif args.tuned_params:
+        lgbm_params = load_tuned_params()
+
+    results = run_strategies(datasets, args.strategies, args.workers, lgbm_params, stations=top_stations)
+
+    # Registration happens here so worker processes never need a Hopsworks session
+    mr = project.get_model_registry()
+    for name, rows in results.items():
+        for row in rows:
+            artifact = row.pop("registry", None)
+            if artifact:
+                register_model(mr, artifact["name"], artifact["model_dir"],
+                               metrics=artifact.get("metrics", {"mae": row["mae"]}),
+                               description=artifact.get("description", ""))
+
+        summary = pd.DataFrame(rows)
+        summary.to_csv(f"{strategies.RESULTS_DIR}/{STRATEGIES[name].summary_file}", index=False)
+        print(f"\n{name} MAE results:")
+        print(summary)
+
+    # Runs queued by MLFLOW_ASYNC_LOGGING in this process (workers flush on exit)
+    flush_mlflow_logging()
+
+if __name__ == "__main__":
+    main()
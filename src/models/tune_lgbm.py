@@ -0,0 +1,198 @@
+"""
+Per-station LightGBM hyperparameter search with early stopping and successive halving.
+
+Random configurations are tried on the lag-28 features. Each trial trains on
+the first 80% of the training slice with early stopping on the last 20%, so
+the test slice stays untouched. Trials run in a process pool. After each rung
+only the best 1/HALVING_RATE of the configurations move on to a larger
+boosting budget; the rest are pruned.
+
+Every trial for a station reuses one LightGBM Dataset binary saved under
+DATASET_CACHE_DIR. Features are binned once per station, not once per trial;
+feature_pre_filter=False keeps that binary valid for any min_child_samples.
+
+The best configuration is refit on the whole training slice, logged with
+log_model_to_mlflow, and written to TUNED_PARAMS_FILE (reused by train_all.py --tuned-params).
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import argparse
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import lightgbm as lgb
+import numpy as np
+from lightgbm import LGBMRegressor
+from sklearn.metrics import mean_absolute_error
+
+from src.models import strategies
+from src.utils.mlflow_logger import log_model_to_mlflow, set_mlflow_tracking
+
+TUNED_PARAMS_FILE = f"{strategies.MODELS_DIR}/lgbm_tuned_params.json"
+DATASET_CACHE_DIR = "data/cache/lgbm_datasets"
+N_TRIALS = 27
+RUNG_ROUNDS = [100, 300, 1000]  # boosting-round budget of each successive-halving rung
+HALVING_RATE = 3
+EARLY_STOPPING_ROUNDS = 50
+VALID_FRACTION = 0.2
+SEED = 42
+
+# Binning settings are fixed so every trial can share one Dataset binary
+DATASET_PARAMS = {"max_bin": 255, "feature_pre_filter": False, "verbose": -1}
+BASE_PARAMS = {"objective": "regression", "metric": "l1", "bagging_freq": 1, "verbose": -1, "seed": SEED}
+
+
+def sample_params(rng):
+    """One random configuration from the search space."""
+    return {
+        "num_leaves": int(np.exp(rng.uniform(np.log(8), np.log(256)))),
+        "learning_rate": float(np.exp(rng.uniform(np.log(0.01), np.log(0.2)))),
+        "min_child_samples": int(rng.integers(5, 101)),
+        "feature_fraction": float(rng.uniform(0.5, 1.0)),
+        "bagging_fraction": float(rng.uniform(0.5, 1.0)),
+        "lambda_l2": float(np.exp(rng.uniform(np.log(1e-3), np.log(10.0)))),
+    }
+
+
+def to_sklearn_params(params, n_estimators):
+    """Map lgb.train parameter names onto LGBMRegressor keyword arguments."""
+    return {
+        "objective": BASE_PARAMS["objective"],
+        "n_estimators": int(n_estimators),
+        "num_leaves": params["num_leaves"],
+        "learning_rate": params["learning_rate"],
+        "min_child_samples": params["min_child_samples"],
+        "colsample_bytree": params["feature_fraction"],
+        "subsample": params["bagging_fraction"],
+        "subsample_freq": BASE_PARAMS["bagging_freq"],
+        "reg_lambda": params["lambda_l2"],
+    }
+
+
+def split_train_valid(data):
+    """Time-ordered split of the station's training slice into fit and early-stopping parts."""
+    cut = int(data.split * (1 - VALID_FRACTION))
+    return (data.X.iloc[:cut], data.y.iloc[:cut]), (data.X.iloc[cut:data.split], data.y.iloc[cut:data.split])
+
+
+def cached_dataset_path(data):
+    """Build (or reuse) the binned training Dataset for a station; returns its binary path."""
+    (X_fit, y_fit), _ = split_train_valid(data)
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X_fit.to_numpy()).tobytes())
+    digest.update(np.ascontiguousarray(y_fit.to_numpy()).tobytes())
+    digest.update(json.dumps(DATASET_PARAMS, sort_keys=True).encode())
+    path = os.path.join(DATASET_CACHE_DIR, f"{data.station_id}_{digest.hexdigest()[:16]}.bin")
+    if not os.path.exists(path):
+        os.makedirs(DATASET_CACHE_DIR, exist_ok=True)
+        lgb.Dataset(X_fit, y_fit, params=DATASET_PARAMS).save_binary(path)
+    return path
+
+
+# Per-worker state: station data plus the loaded Dataset for each station
+_DATASETS = None
+_LOADED = {}
+
+def _init_worker(datasets, paths, threads):
+    global _DATASETS
+    _DATASETS = datasets
+    _LOADED.clear()
+    for station_id, path in paths.items():
+        train_set = lgb.Dataset(path, params=DATASET_PARAMS).construct()
+        _, (X_valid, y_valid) = split_train_valid(datasets[station_id])
+        valid_set = lgb.Dataset(X_valid, y_valid, reference=train_set).construct()
+        _LOADED[station_id] = (train_set, valid_set)
+    BASE_PARAMS["num_threads"] = threads
+
+def _run_trial(station_id, params, rounds):
+    train_set, valid_set = _LOADED[station_id]
+    booster = lgb.train(
+        {**BASE_PARAMS, **params},
+        train_set,
+        num_boost_round=rounds,
+        valid_sets=[valid_set],
+        callbacks=[lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)],
+    )
+    return booster.best_score["valid_0"]["l1"], booster.best_iteration or rounds
+
+
+def tune_station(pool, station_id, n_trials=N_TRIALS, seed=SEED):
+    """Successive halving over random configurations; returns (best params, best iteration, valid MAE)."""
+    rng = np.random.default_rng(seed)
+    candidates = [sample_params(rng) for _ in range(n_trials)]
+
+    for rung, rounds in enumerate(RUNG_ROUNDS):
+        results = list(pool.map(_run_trial, [station_id] * len(candidates), candidates, [rounds] * len(candidates)))
+        ranked = sorted(zip(results, candidates), key=lambda item: item[0][0])
+        best_mae, best_iteration = ranked[0][0]
+        print(f"🔎 {station_id} rung {rung} ({rounds} rounds): {len(candidates)} trials, best valid MAE {best_mae:.3f}")
+        if rung < len(RUNG_ROUNDS) - 1:
+            candidates = [params for _, params in ranked[:max(1, len(ranked) // HALVING_RATE)]]
+
+    return ranked[0][1], best_iteration, best_mae
+
+
+def tune(datasets, n_trials=N_TRIALS, workers=None):
+    """Tune every station; returns {station_id: LGBMRegressor params}."""
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    paths = {station_id: cached_dataset_path(data) for station_id, data in datasets.items()}
+
+    tuned = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(datasets, paths, threads)) as pool:
+        for station_id, data in datasets.items():
+            params, best_iteration, valid_mae = tune_station(pool, station_id, n_trials)
+            sk_params = to_sklearn_params(params, best_iteration)
+
+            # Refit the winner on the full training slice and score it on the untouched test slice
+            model = LGBMRegressor(random_state=SEED, **sk_params)
+            model.fit(data.X_train, data.y_train)
+            mae = mean_absolute_error(data.y_test, model.predict(data.X_test))
+            print(f"✅ {station_id}: valid MAE {valid_mae:.3f}, test MAE {mae:.3f} with {sk_params}")
+
+            log_model_to_mlflow(
+                model=model,
+                input_data=data.X_test,
+                experiment_name="citibike-lgbm-tuning",
+                metric_name="mae",
+                model_name=f"LGBMTuned_{station_id}",
+                score=float(mae),
+                params={"station_id": station_id, "n_trials": int(n_trials), **sk_params}
+            )
+            tuned[station_id] = sk_params
+    return tuned
+
+
+def load_tuned_params(path=TUNED_PARAMS_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_tuned_params(tuned, path=TUNED_PARAMS_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(tuned, f, indent=2)
+    print(f"💾 Saved tuned parameters for {len(tuned)} stations to {path}")
+
+
+if __name__ == "__main__":
+    from src.models.strategies import build_station_datasets
+    from src.models.train_all import TOP_STATIONS
+    from src.utils.feature_store import RIDE_COLUMNS, login, read_features
+
+    parser = argparse.ArgumentParser(description="Tune LightGBM per station on the lag-28 features.")
+    parser.add_argument("--trials", type=int, default=N_TRIALS)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    set_mlflow_tracking()
+    project = login()
+    fs = project.get_feature_store()
+    df = read_features(fs, stations=TOP_STATIONS, columns=RIDE_COLUMNS)
+    save_tuned_params(tune(build_station_datasets(df, TOP_STATIONS), args.trials, args.workers))
@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import glob
+
+import pandas as pd
+
+from src.utils.feature_store import login
+from src.utils.prediction_store import write_metrics
+from src.utils.run_info import current_run_id
+
+METRICS_DIR = "data/metrics"
+SUMMARY_SUFFIX = "_mae_summary.csv"
+
+# One long-format table for every model: a row per (model, strategy, station, run, metric)
+FEATURE_GROUP_NAME = "citibike_model_metrics"
+FEATURE_GROUP_VERSION = 1
+PRIMARY_KEYS = ["model", "strategy", "station_id", "run_id", "metric"]
+
+def summary_files(metrics_dir=METRICS_DIR):
+    return sorted(glob.glob(os.path.join(metrics_dir, f"*{SUMMARY_SUFFIX}")))
+
+def to_long(path, run_id, run_at):
+    """
+    Melt one MAE summary into metric/value rows. Every numeric column besides the
+    keys is a metric (mae, explained_variance, mae_all_horizons, ...); summaries
+    without a model or strategy column fall back to the file name.
+    """
+    source = os.path.basename(path)[:-len(SUMMARY_SUFFIX)]
+    df = pd.read_csv(path)
+    if "model" not in df.columns:
+        df["model"] = source
+    if "strategy" not in df.columns:
+        df["strategy"] = source
+
+    metric_columns = [c for c in df.select_dtypes("number").columns if c not in PRIMARY_KEYS]
+    long = df.melt(id_vars=["model", "strategy", "station_id"], value_vars=metric_columns,
+                   var_name="metric", value_name="value")
+    long["value"] = long["value"].astype(float)
+    long["source"] = source
+    long["run_id"] = run_id
+    long["run_at"] = run_at
+    return long
+
+def upload_metrics(metrics_dir=METRICS_DIR):
+    paths = summary_files(metrics_dir)
+    if not paths:
+        print(f"🚫 No *{SUMMARY_SUFFIX} files in {metrics_dir}. Nothing to upload.")
+        return
+
+    run_id, run_at = current_run_id(), pd.Timestamp.now(tz="UTC")
+    df = pd.concat([to_long(path, run_id, run_at) for path in paths], ignore_index=True)
+    print(f"📊 Collected {len(df)} metric rows from {len(paths)} summaries for run {run_id}")
+    # Local copy for the DuckDB dashboard backend (DASHBOARD_BACKEND=duckdb)
+    write_metrics(df, run_id)
+
+    project = login()
+    fs = project.get_feature_store()
+    fg = fs.get_or_create_feature_group(
+        name=FEATURE_GROUP_NAME,
+        version=FEATURE_GROUP_VERSION,
+        description="Per-station model metrics from every training run (long format)",
+        primary_key=PRIMARY_KEYS,
+        event_time="run_at"
+    )
+    # All summaries go in one insert, so training waits on a single materialization job
+    fg.insert(df, write_options={"wait_for_job": True}, operation="upsert")
+    print(f"✅ Uploaded {len(df)} rows to {FEATURE_GROUP_NAME}")
+
+if __name__ == "__main__":
+    upload_metrics()
@@ -1,40 +1,83 @@
+import sys
 import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import json
 import pandas as pd
-import hopsworks
 
-FEATURE_GROUP_NAME = "citibike_features_dataset"
-FEATURE_GROUP_VERSION = 1
+from src.features.hourly_grid import LATE_TRIP_OVERLAP_HOURS
+from src.utils.feature_store import FEATURE_GROUP_NAME, FEATURE_GROUP_VERSION, login, query_features
+
 INPUT_PATH = "data/processed/jc_recent_hourly_features.csv"
+WATERMARK_PATH = "data/processed/upload_watermark.json"
+PRIMARY_KEY = ["start_station_id", "hour"]
+
+# engineer_recent_features.py recounts this many hours before its last run's
+# newest hour; they are re-sent here and the upsert replaces them in place, so
+# late-arriving trips in the overlap correct earlier counts
+UPSERT_OVERLAP_HOURS = LATE_TRIP_OVERLAP_HOURS
+
+def load_watermarks(path=WATERMARK_PATH):
+    """Newest uploaded hour per station, as stored by the previous run (None if missing)."""
+    try:
+        with open(path) as f:
+            return {station: pd.Timestamp(hour) for station, hour in json.load(f).items()}
+    except FileNotFoundError:
+        return None
+
+def save_watermarks(watermarks, path=WATERMARK_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({station: hour.isoformat() for station, hour in sorted(watermarks.items())}, f, indent=2)
+    os.replace(tmp_path, path)
+
+def bootstrap_watermarks(fs, since):
+    """
+    Rebuild the watermarks from the feature group without a full read: only the
+    key columns, and only rows from the start of the local window onwards.
+    """
+    keys = query_features(fs, start=since, columns=PRIMARY_KEY)
+    if keys.empty:
+        return {}
+    keys["hour"] = pd.to_datetime(keys["hour"], utc=True)
+    return keys.groupby("start_station_id")["hour"].max().to_dict()
 
 def upload_incremental():
     print("🔐 Logging in to Hopsworks...")
-    project = hopsworks.login(
-        project=os.environ["HOPSWORKS_PROJECT_NAME"],
-        api_key_value=os.environ["HOPSWORKS_API_KEY"]
-    )
+    project = login()
     fs = project.get_feature_store()
 
     # Load engineered data
     df = pd.read_csv(INPUT_PATH, parse_dates=["hour"])
     df["hour"] = pd.to_datetime(df["hour"]).dt.tz_localize("UTC")
     print(f"📈 Loaded {len(df)} rows from {INPUT_PATH}")
+    if df.empty:
+        print("🚫 No new data to upload. Exiting safely.")
+        return
 
-    # Get existing feature group
-    fg = fs.get_feature_group(name=FEATURE_GROUP_NAME, version=FEATURE_GROUP_VERSION)
-    existing_df = fg.read()
-    latest_hour = existing_df["hour"].max()
-    print(f"📅 Latest hour in Hopsworks: {latest_hour}")
+    watermarks = load_watermarks()
+    if watermarks is None:
+        print("📅 No upload watermark yet, reading keys for the local window from Hopsworks...")
+        watermarks = bootstrap_watermarks(fs, since=df["hour"].min())
 
-    # Filter: Only new rows
-    df_to_upload = df[df["hour"] > latest_hour].copy()
-    df_to_upload.drop_duplicates(subset=["hour", "start_station_id"], keep="last", inplace=True)
+    # Per station: everything after its watermark minus the overlap; unseen stations send all rows
+    floor = df["start_station_id"].map(watermarks)
+    floor = pd.to_datetime(floor, utc=True) - pd.Timedelta(hours=UPSERT_OVERLAP_HOURS)
+    df_to_upload = df[floor.isna() | (df["hour"] > floor)].copy()
+    df_to_upload.drop_duplicates(subset=PRIMARY_KEY, keep="last", inplace=True)
 
     if df_to_upload.empty:
         print("🚫 No new data to upload. Exiting safely.")
         return
 
-    print(f"⬆️ Uploading {len(df_to_upload)} new rows to Hopsworks...")
-    fg.insert(df_to_upload, write_options={"wait_for_job": True, "write_mode": "append"})
+    print(f"⬆️ Upserting {len(df_to_upload)} rows for {df_to_upload['start_station_id'].nunique()} stations...")
+    fg = fs.get_feature_group(name=FEATURE_GROUP_NAME, version=FEATURE_GROUP_VERSION)
+    fg.insert(df_to_upload, write_options={"wait_for_job": True}, operation="upsert")
+
+    newest = df_to_upload.groupby("start_station_id")["hour"].max()
+    for station, hour in newest.items():
+        watermarks[station] = max(hour, watermarks.get(station, hour))
+    save_watermarks(watermarks)
     print("✅ Upload complete!")
 
 if __name__ == "__main__":
@@ -1,56 +1,124 @@
+import sys
 import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
-import hopsworks
+
+from src.utils.feature_store import login
+from src.utils.prediction_store import (
+    PREDICTION_GROUPS, PREDICTIONS_DIR, ROLLUP_FG_VERSION, bucket_rows, prediction_partitions, rollup,
+    rollup_group_name, row_digests
+)
 
 # ---------------- SETUP ----------------
-project = hopsworks.login()
+project = login()
 fs = project.get_feature_store()
 
 # ---------------- CONFIG ----------------
-UPLOADS = [
-    ("predictions_lgbm_lag28", "citibike_predictions_lag28"),
-    ("predictions_lgbm_topk", "citibike_predictions_topk"),
-    ("predictions_lgbm_pca", "citibike_predictions_pca"),
-    ("future_lgbm_lag28", "citibike_forecast_lag28"),
-    ("future_lgbm_topk", "citibike_forecast_topk"),
-    ("future_lgbm_pca", "citibike_forecast_pca"),
-]
-
-METRICS_PATH = "data/metrics"
-PRIMARY_KEYS = ["hour", "station_id"]
+# v2 adds run_id and model_version; rows are upserted on (station_id, hour), so each
+# run only rewrites the hours it predicted and older hours keep their last prediction
+FEATURE_GROUP_VERSION = 2
+PRIMARY_KEYS = ["station_id", "hour"]
+# Row digests of each partition as last uploaded: STATE_DIR/<prefix>/<station_id>.parquet
+STATE_DIR = os.path.join(PREDICTIONS_DIR, "_upload_state")
+MAX_WORKERS = len(PREDICTION_GROUPS)
 
-# ---------------- FUNCTION ----------------
-def upload_csv_group(prefix, feature_group_name):
-    matching_files = [
-        f for f in os.listdir(METRICS_PATH)
-        if f.startswith(prefix) and f.endswith(".csv")
-    ]
+# ---------------- HELPERS ----------------
+def state_path(prefix, station_id, root=STATE_DIR):
+    return os.path.join(root, prefix, f"{station_id}.parquet")
 
-    if not matching_files:
-        print(f"⚠️ No files found for prefix: {prefix}")
-        return
-
-    dfs = []
-    for file in matching_files:
-        station_id = file.split("_")[-1].replace(".csv", "")
-        df = pd.read_csv(os.path.join(METRICS_PATH, file), parse_dates=["hour"])
-        df["station_id"] = station_id
-        dfs.append(df)
+def load_uploaded(path):
+    """Row digests of a partition as of its last successful upload (empty if never uploaded)."""
+    try:
+        return pd.read_parquet(path, columns=["digest"])["digest"].to_numpy()
+    except FileNotFoundError:
+        return []
 
-    combined = pd.concat(dfs).sort_values(["station_id", "hour"])
-    print(f"⬆️ Uploading {prefix} → Feature Group: {feature_group_name}")
+def save_uploaded(path, df, digests):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    pd.DataFrame({"hour": df["hour"].to_numpy(), "digest": digests}).to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
 
+def upsert(feature_group_name, version, df, description):
     fg = fs.get_or_create_feature_group(
         name=feature_group_name,
-        version=1,
+        version=version,
         primary_key=PRIMARY_KEYS,
         event_time="hour",
-        description=f"{prefix} predictions generated by inference workflow"
+        description=description
     )
+    fg.insert(df, write_options={"wait_for_job": True}, operation="upsert")
+
+# ---------------- FUNCTION ----------------
+def upload_group(prefix, feature_group_name, rollups):
+    """
+    Upsert the rows of one prefix that are new or changed since its last upload.
+
+    Test-slice partitions are rewritten every run with a window that shifts by the
+    new hours, so rows are diffed on their digests rather than whole partitions.
+    """
+    partitions = prediction_partitions(prefix)
+    if not partitions:
+        print(f"⚠️ No files found for prefix: {prefix}")
+        return
+
+    changed_rows, rollup_rows, uploaded = [], {name: [] for name in rollups}, {}
+    for station_id, path in partitions.items():
+        df = pd.read_parquet(path)
+        digests = row_digests(df)
+        state_file = state_path(prefix, station_id)
+        changed = ~pd.Series(digests).isin(load_uploaded(state_file)).to_numpy()
+        if not changed.any():
+            continue
+        changed_rows.append(df[changed])
+        for rollup_name in rollups:
+            rollup_rows[rollup_name].append(bucket_rows(df, changed, rollup_name))
+        uploaded[state_file] = (df, digests)
+
+    if not changed_rows:
+        print(f"⏭️ {prefix}: all {len(partitions)} partitions unchanged")
+        return
+
+    combined = pd.concat(changed_rows, ignore_index=True).sort_values(PRIMARY_KEYS)
+
+    # Rollups of every bucket holding a changed row, re-aggregated from all of its hours,
+    # so the dashboards never regroup hourly rows. Test-slice predictions accumulate
+    # across runs, so a partition's partial first bucket is left alone; the other
+    # buckets passed in are whole, so only that one can be dropped. They are built
+    # before any upsert, so a bad rollup cannot leave the hourly group half-published.
+    rolled = {}
+    for rollup_name in rollups:
+        rows = pd.concat(rollup_rows[rollup_name], ignore_index=True)
+        rolled[rollup_name] = rollup(rows, rollup_name, complete_start=prefix.startswith("predictions_"))
+
+    print(f"⬆️ Upserting {len(combined)} new or changed rows from {len(uploaded)}/{len(partitions)} partitions of {prefix} → {feature_group_name}")
+    upsert(feature_group_name, FEATURE_GROUP_VERSION, combined,
+           f"{prefix} predictions generated by inference workflow")
+    for rollup_name, df in rolled.items():
+        if df.empty:
+            continue
+        upsert(rollup_group_name(feature_group_name, rollup_name), ROLLUP_FG_VERSION, df,
+               f"{rollup_name} rollup of {feature_group_name} for the dashboards")
 
-    fg.insert(combined, write_options={"wait_for_job": True, "write_mode": "overwrite"})
-    print(f"✅ Uploaded to {feature_group_name}\n")
+    # Recorded only once every upsert of the group succeeded
+    for state_file, (df, digests) in uploaded.items():
+        save_uploaded(state_file, df, digests)
+    print(f"✅ Uploaded to {feature_group_name} (+ {', '.join(rollups)} rollups)\n")
 
 # ---------------- MAIN ----------------
-for prefix, fg_name in UPLOADS:
-    upload_csv_group(prefix, fg_name)
+if __name__ == "__main__":
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = [pool.submit(upload_group, prefix, fg_name, rollups)
+                   for prefix, fg_name, rollups in PREDICTION_GROUPS]
+        # Each group records its own upload state, so let every group finish before surfacing a failure
+        errors = []
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(e)
+    if errors:
+        raise errors[0]
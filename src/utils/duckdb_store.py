@@ -0,0 +1,99 @@
+"""
+Embedded DuckDB queries over the local prediction dataset (DASHBOARD_BACKEND=duckdb).
+
+The inference scripts write PREDICTIONS_DIR/<prefix>/<station_id>.parquet and
+upload_metrics.py writes PREDICTIONS_DIR/_metrics/<run_id>.parquet. DuckDB scans
+those files directly: station and time filters are pushed into the Parquet
+scan and the daily / 6-hour rollups are computed in SQL, so no whole group is
+materialized in pandas. Each local partition holds its prefix's latest run.
+"""
+import glob
+import os
+import threading
+
+import pandas as pd
+
+from src.utils.prediction_store import METRICS_PREFIX, PREDICTION_GROUPS, PREDICTIONS_DIR, rollup_group_name
+
+ROLLUP_INTERVALS = {"daily": "1 day", "6h": "6 hours"}
+
+_connection = None
+_lock = threading.Lock()
+
+
+def connect():
+    """Process-wide in-memory connection; callers query through their own cursor."""
+    global _connection
+    with _lock:
+        if _connection is None:
+            import duckdb
+            _connection = duckdb.connect()
+            _connection.execute("SET TimeZone = 'UTC'")
+    return _connection
+
+
+def _query(sql, params=()):
+    # A cursor per query: DuckDB connections must not be shared across threads
+    return connect().cursor().execute(sql, list(params)).df()
+
+
+def _rollup_sources(root=PREDICTIONS_DIR):
+    """{rollup feature group name: (parquet glob, rollup name, has actual_rides)}."""
+    return {
+        rollup_group_name(feature_group_name, rollup_name): (
+            os.path.join(root, prefix, "*.parquet"), rollup_name, prefix.startswith("predictions_")
+        )
+        for prefix, feature_group_name, rollups in PREDICTION_GROUPS
+        for rollup_name in rollups
+    }
+
+
+def _newest_mtime(pattern):
+    return max((os.path.getmtime(path) for path in glob.glob(pattern)), default=None)
+
+
+def rollup_mtime(name, root=PREDICTIONS_DIR):
+    """Newest write to the partitions behind a rollup group (its version for the dashboard refresher)."""
+    return _newest_mtime(_rollup_sources(root)[name][0])
+
+
+def metrics_mtime(root=PREDICTIONS_DIR):
+    return _newest_mtime(os.path.join(root, METRICS_PREFIX, "*.parquet"))
+
+
+def read_rollup(name, station, since=None, root=PREDICTIONS_DIR):
+    """
+    One station's rows of a rollup group (e.g. citibike_forecast_lag28_6h),
+    aggregated from the hourly Parquet partitions in the same shape the
+    uploader materializes in Hopsworks.
+    """
+    path, rollup_name, has_actuals = _rollup_sources(root)[name]
+    if not glob.glob(path):
+        return pd.DataFrame()
+
+    bucket = f"time_bucket(INTERVAL '{ROLLUP_INTERVALS[rollup_name]}', hour)"
+    actuals = "avg(actual_rides) AS actual_rides," if has_actuals else ""
+    where, params = "station_id = ?", [station]
+    if since is not None:
+        where += " AND hour >= ?"
+        params.append(since)
+    return _query(f"""
+        SELECT station_id, {bucket} AS hour,
+               avg(predicted_rides) AS predicted_rides, {actuals}
+               count(*) AS n_hours, last(run_id ORDER BY hour) AS run_id, max(model_version) AS model_version
+        FROM read_parquet('{path}')
+        WHERE {where}
+        GROUP BY ALL
+        ORDER BY hour
+    """, params)
+
+
+def read_metrics(root=PREDICTIONS_DIR):
+    """Long-format metrics of each model and station's latest run."""
+    path = os.path.join(root, METRICS_PREFIX, "*.parquet")
+    if not glob.glob(path):
+        return pd.DataFrame()
+    return _query(f"""
+        SELECT * FROM read_parquet('{path}', union_by_name = true)
+        QUALIFY run_at = max(run_at) OVER (PARTITION BY model, station_id)
+    """)
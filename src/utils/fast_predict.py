@@ -0,0 +1,115 @@
+"""
+Low-overhead prediction for LightGBM models in the recursive forecast loop.
+
+LGBMRegressor.predict on a one-row DataFrame spends most of its time in pandas
+and sklearn validation, not in the trees. FastPredictor calls the raw Booster
+on a C-contiguous float64 array instead; inputs in any other layout are copied
+into a buffer kept per batch shape, so the loop's steps do not allocate it again.
+
+Backends (PREDICT_BACKEND env var, or the `backend` argument):
+    booster - raw Booster on NumPy input (default)
+    sklearn - the model's own predict, i.e. the previous behaviour
+
+Parity and latency check for a saved model:
+    python src/utils/fast_predict.py trained_models/topk_model_JC115/model.pkl
+"""
+import os
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+
+BACKENDS = ("booster", "sklearn")
+PREDICT_BACKEND = os.getenv("PREDICT_BACKEND", "booster")
+
+
+def _booster(model):
+    """The underlying lightgbm.Booster, or None for non-LightGBM models."""
+    booster = getattr(model, "booster_", model)
+    return booster if hasattr(booster, "dump_model") else None
+
+
+class FastPredictor:
+    """
+    predict(X) for a fitted model, taking a NumPy array (or DataFrame) whose
+    columns are in the model's training order. Its input buffers make it
+    unsafe to share between threads.
+    """
+
+    def __init__(self, model, backend=None):
+        backend = backend or PREDICT_BACKEND
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown predict backend {backend!r}; expected one of {BACKENDS}")
+        self.model = model
+        self.booster = _booster(model)
+        self.feature_names = getattr(model, "feature_names_in_", None)
+        self.backend = backend if self.booster is not None else "sklearn"
+        self._buffers = {}
+
+    def _as_input(self, X):
+        if isinstance(X, np.ndarray) and X.dtype == np.float64 and X.flags.c_contiguous:
+            return X
+        X = X.to_numpy() if isinstance(X, pd.DataFrame) else X
+        out = self._buffers.get(np.shape(X))
+        if out is None:
+            out = self._buffers[np.shape(X)] = np.empty(np.shape(X), dtype=np.float64)
+        np.copyto(out, X, casting="unsafe")
+        return out
+
+    def predict(self, X):
+        if self.backend == "sklearn":
+            if self.feature_names is not None and not isinstance(X, pd.DataFrame):
+                X = pd.DataFrame(X, columns=self.feature_names)
+            return self.model.predict(X)
+        return self.booster.predict(self._as_input(X))
+
+
+# One FastPredictor per (model, backend), so repeated calls reuse its input buffers
+_PREDICTORS = weakref.WeakKeyDictionary()
+
+
+def fast_predictor(model, backend=None):
+    """Shared FastPredictor for `model`; built once and dropped with the model."""
+    backend = backend or PREDICT_BACKEND
+    try:
+        by_backend = _PREDICTORS.setdefault(model, {})
+    except TypeError:  # not weak-referenceable
+        return FastPredictor(model, backend)
+    if backend not in by_backend:
+        by_backend[backend] = FastPredictor(model, backend)
+    return by_backend[backend]
+
+
+def _time_per_call(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+if __name__ == "__main__":
+    import argparse
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Check a saved LightGBM model against the booster predictor.")
+    parser.add_argument("model_path")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model_path)
+    fast = FastPredictor(model, backend="booster")
+    if fast.booster is None:
+        raise SystemExit(f"❌ {args.model_path} is not a LightGBM model")
+
+    probe = np.random.default_rng(0).normal(size=(1024, fast.booster.num_feature()))
+    columns = fast.feature_names if fast.feature_names is not None else getattr(model, "feature_name_", None)
+    error = np.max(np.abs(fast.predict(probe) - model.predict(pd.DataFrame(probe, columns=columns))))
+    print(f"🔍 Parity on {len(probe)} rows: max abs diff {error:.3g}")
+
+    for n_rows in (1, 3):
+        rows = probe[:n_rows]
+        frame = pd.DataFrame(rows, columns=columns)
+        baseline = _time_per_call(lambda: model.predict(frame), args.repeats)
+        booster = _time_per_call(lambda: fast.predict(rows), args.repeats)
+        print(f"⏱️ {n_rows}-row predict: model.predict {baseline:.0f} µs, booster {booster:.0f} µs ({baseline / booster:.1f}x)")
@@ -0,0 +1,211 @@
+"""
+Local Parquet cache of feature groups with incremental, watermark-based sync.
+
+Each feature group is mirrored under FEATURE_CACHE_DIR/<name>_<version>/ as a
+hive-partitioned dataset (start_station_id=<id>/month=<YYYY-MM>/). A sync only
+fetches rows newer than the stored watermark, so consecutive jobs in the same
+workflow share one download and later runs pull just the new hours.
+
+The remote group's latest commit is stored with the watermark. When the commits
+since then show rows the incremental window cannot have seen (a rewrite that
+deleted rows, or more inserts than the window found, e.g. a backfill), the
+cache is rebuilt from a full read.
+"""
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR", "data/cache/features")
+# Each sync re-fetches this many hours before the watermark, so rows upserted
+# late (upload_recent_to_hopsworks.py re-sends an overlap) reach the cache too
+SYNC_OVERLAP_HOURS = int(os.getenv("FEATURE_CACHE_OVERLAP_HOURS", "48"))
+
+STATION_COLUMN = "start_station_id"
+TIME_COLUMN = "hour"
+SEQ_COLUMN = "_sync_seq"  # orders overlapping rows from different syncs, newest wins
+PARTITIONING = ds.partitioning(
+    pa.schema([(STATION_COLUMN, pa.string()), ("month", pa.string())]), flavor="hive"
+)
+
+
+def _utc(value):
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+class FeatureCache:
+    def __init__(self, root=FEATURE_CACHE_DIR):
+        self.root = root
+
+    def _path(self, name, version):
+        return os.path.join(self.root, f"{name}_{version}")
+
+    def _state_file(self, name, version):
+        return os.path.join(self._path(name, version), "_watermark.json")
+
+    def _state(self, name, version):
+        try:
+            with open(self._state_file(name, version)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def watermark(self, name, version):
+        """Return (newest cached hour, last sync sequence) or (None, 0) for an empty cache."""
+        state = self._state(name, version)
+        if not state:
+            return None, 0
+        return pd.Timestamp(state["hour"]), state["seq"]
+
+    def clear(self, name, version):
+        shutil.rmtree(self._path(name, version), ignore_errors=True)
+
+    def sync(self, name, version, fetch, commits=None):
+        """
+        Append rows newer than the watermark to the cache.
+
+        fetch: callable(after) -> DataFrame of rows with hour > after
+            (after is None on the first sync, meaning "everything").
+        commits: optional callable() -> the group's commit details
+            ({commit id: {"rowsInserted": ..., "rowsDeleted": ...}}), or None when
+            it keeps no commit history; used to detect writes outside the window.
+        The last SYNC_OVERLAP_HOURS before the watermark are fetched again and
+        only rows that changed since they were cached are stored.
+        Returns the number of rows added.
+        """
+        history = commits() if commits is not None else None
+        state = self._state(name, version)
+        if state and history:
+            reason = self._resync_reason(state, history)
+            if reason:
+                print(f"♻️ {name}: {reason}; rebuilding the feature cache.")
+                self.clear(name, version)
+                state = {}
+
+        added, new_keys = self._sync(name, version, fetch, state, history)
+        if state and history:
+            inserted = sum(c.get("rowsInserted", 0) for cid, c in history.items() if int(cid) > int(state["commit"]))
+            if inserted > new_keys:
+                # Rows were inserted before the overlap window (a backfill), so the window missed them
+                print(f"♻️ {name}: {inserted} rows inserted, {new_keys} in the synced window; rebuilding the feature cache.")
+                self.clear(name, version)
+                added, _ = self._sync(name, version, fetch, {}, history)
+        return added
+
+    @staticmethod
+    def _resync_reason(state, history):
+        """Why the incremental window cannot be trusted, or None."""
+        if state.get("commit") is None:
+            return "no commit recorded with the cache"
+        seen = int(state["commit"])
+        if seen not in {int(cid) for cid in history}:
+            return f"commit {seen} is no longer in its history"
+        if any(c.get("rowsDeleted", 0) for cid, c in history.items() if int(cid) > seen):
+            return "rows were deleted or overwritten since the last sync"
+        return None
+
+    def _sync(self, name, version, fetch, state, history):
+        """One incremental (or, with an empty state, full) sync; returns (rows stored, new keys)."""
+        watermark = pd.Timestamp(state["hour"]) if state else None
+        seq = state.get("seq", 0)
+        commit = max((int(cid) for cid in history), default=None) if history else None
+        after = None if watermark is None else _utc(watermark) - pd.Timedelta(hours=SYNC_OVERLAP_HOURS)
+        new_rows = fetch(after)
+        new_keys = 0
+        if not new_rows.empty:
+            new_rows = new_rows.copy()
+            new_rows[STATION_COLUMN] = new_rows[STATION_COLUMN].astype(str)
+            new_rows[TIME_COLUMN] = pd.to_datetime(new_rows[TIME_COLUMN], utc=True)
+            if after is not None:
+                new_rows, new_keys = self._changed_rows(name, version, new_rows, after)
+            else:
+                new_keys = len(new_rows.drop_duplicates(subset=[STATION_COLUMN, TIME_COLUMN]))
+        if new_rows.empty:
+            if state and commit is not None and state.get("commit") != commit:
+                self._save_state(name, version, watermark, seq, commit)
+            print(f"💾 Feature cache for {name} is up to date (watermark {watermark}).")
+            return 0, new_keys
+
+        new_rows["month"] = new_rows[TIME_COLUMN].dt.strftime("%Y-%m")
+        new_rows[SEQ_COLUMN] = seq + 1
+
+        path = self._path(name, version)
+        pq.write_to_dataset(
+            pa.Table.from_pandas(new_rows, preserve_index=False),
+            root_path=path,
+            partition_cols=[STATION_COLUMN, "month"],
+            basename_template=f"part-{time.time_ns():020d}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+        newest = new_rows[TIME_COLUMN].max()
+        if watermark is not None:
+            newest = max(newest, _utc(watermark))
+        self._save_state(name, version, newest, seq + 1, commit)
+
+        print(f"💾 Cached {len(new_rows)} new rows for {name} (watermark {newest}).")
+        return len(new_rows), new_keys
+
+    def _save_state(self, name, version, hour, seq, commit):
+        with open(self._state_file(name, version), "w") as f:
+            json.dump({"hour": _utc(hour).isoformat(), "seq": seq, "commit": commit}, f)
+
+    def _changed_rows(self, name, version, rows, after):
+        """Drop re-fetched overlap rows that are identical to the cached copy; also count keys not cached yet."""
+        cached = self.read(name, version, start=after + pd.Timedelta(microseconds=1))
+        if cached.empty:
+            return rows, len(rows.drop_duplicates(subset=[STATION_COLUMN, TIME_COLUMN]))
+        columns = [c for c in rows.columns if c in cached.columns]
+        merged = rows.merge(cached[columns], on=[STATION_COLUMN, TIME_COLUMN], how="left",
+                            suffixes=("", "_cached"), indicator=True)
+        changed = merged["_merge"] == "left_only"
+        for column in columns:
+            if column in (STATION_COLUMN, TIME_COLUMN):
+                continue
+            old, new = merged[f"{column}_cached"], merged[column]
+            changed |= ~((old == new) | (old.isna() & new.isna()))
+        new_keys = merged.loc[merged["_merge"] == "left_only", [STATION_COLUMN, TIME_COLUMN]].drop_duplicates()
+        return rows[changed.to_numpy()], len(new_keys)
+
+    def read(self, name, version, stations=None, start=None, end=None, columns=None):
+        """Read cached rows with station and time filters applied while scanning Parquet."""
+        path = self._path(name, version)
+        if not os.path.isdir(path):
+            return pd.DataFrame(columns=columns)
+
+        dataset = ds.dataset(path, format="parquet", partitioning=PARTITIONING)
+        condition = None
+
+        def combine(expr):
+            return expr if condition is None else condition & expr
+
+        if stations is not None:
+            condition = combine(ds.field(STATION_COLUMN).isin([str(s) for s in stations]))
+        if start is not None:
+            start = _utc(start)
+            condition = combine(ds.field("month") >= start.strftime("%Y-%m"))
+            condition = combine(ds.field(TIME_COLUMN) >= pa.scalar(start, type=pa.timestamp("ns", tz="UTC")))
+        if end is not None:
+            end = _utc(end)
+            condition = combine(ds.field("month") <= end.strftime("%Y-%m"))
+            condition = combine(ds.field(TIME_COLUMN) < pa.scalar(end, type=pa.timestamp("ns", tz="UTC")))
+
+        read_columns = None
+        if columns:
+            read_columns = list(dict.fromkeys(list(columns) + [STATION_COLUMN, TIME_COLUMN, SEQ_COLUMN]))
+        df = dataset.to_table(columns=read_columns, filter=condition).to_pandas()
+
+        # A row re-synced after a late update lives in several files; keep the newest copy
+        df = (
+            df.sort_values([STATION_COLUMN, TIME_COLUMN, SEQ_COLUMN])
+            .drop_duplicates(subset=[STATION_COLUMN, TIME_COLUMN], keep="last")
+            .drop(columns=[SEQ_COLUMN, "month"], errors="ignore")
+            .reset_index(drop=True)
+        )
+        return df[list(columns)] if columns else df
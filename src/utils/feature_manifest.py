@@ -0,0 +1,51 @@
+"""
+Typed record of the exact input columns a model was trained on.
+
+Saved as feature_manifest.json next to model.pkl so inference builds those
+columns, in that order, instead of re-deriving them from the model.
+"""
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from typing import List
+
+MANIFEST_FILE = "feature_manifest.json"
+LAG_PATTERN = re.compile(r"^lag_(\d+)$")
+
+
+@dataclass(frozen=True)
+class FeatureManifest:
+    features: List[str]
+    n_lags: int
+    selection: str = "all_lags"
+    params: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        for name in self.features:
+            match = LAG_PATTERN.match(name)
+            if not match or not 1 <= int(match.group(1)) <= self.n_lags:
+                raise ValueError(f"Feature {name!r} is not a lag in 1..{self.n_lags}")
+
+    @property
+    def lags(self):
+        """Lag numbers in model column order, e.g. [3, 1, 24]."""
+        return [int(LAG_PATTERN.match(name).group(1)) for name in self.features]
+
+    def save(self, model_dir):
+        with open(os.path.join(model_dir, MANIFEST_FILE), "w") as f:
+            json.dump(asdict(self), f, indent=2)
+
+    @classmethod
+    def load(cls, model_dir, model=None, n_lags=28):
+        """
+        Read the manifest saved with a model. Artifacts from before manifests
+        existed fall back to the column names the model itself was fitted on.
+        """
+        path = os.path.join(model_dir, MANIFEST_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                return cls(**json.load(f))
+        if model is not None and hasattr(model, "feature_name_"):
+            return cls(features=list(model.feature_name_), n_lags=n_lags, selection="model_feature_names")
+        raise FileNotFoundError(f"No {MANIFEST_FILE} in {model_dir} and the model has no feature names")
@@ -0,0 +1,126 @@
+import os
+
+import pandas as pd
+
+from src.utils.feature_cache import FeatureCache
+
+FEATURE_GROUP_NAME = "citibike_features_dataset"
+FEATURE_GROUP_VERSION = 1
+
+# The scripts rebuild their own lags from the raw hourly counts, so this is all they need
+RIDE_COLUMNS = ["start_station_id", "hour", "rides"]
+
+# Window used to find the most recent hours per station before falling back to a full read
+LATEST_LOOKBACK_DAYS = 120
+
+# Serve feature reads from the local Parquet cache unless FEATURE_CACHE=0
+USE_FEATURE_CACHE = os.getenv("FEATURE_CACHE", "1") != "0"
+
+_synced = set()
+
+
+def login():
+    """
+    Log in to Hopsworks, or to the local file-backed stand-in when
+    HOPSWORKS_OFFLINE=1 so the pipeline can run without a cluster.
+    """
+    if os.getenv("HOPSWORKS_OFFLINE", "0") == "1":
+        from src.utils import local_hopsworks
+        return local_hopsworks.login()
+
+    import hopsworks
+    return hopsworks.login(
+        project=os.getenv("HOPSWORKS_PROJECT_NAME"),
+        api_key_value=os.getenv("HOPSWORKS_API_KEY"),
+    )
+
+
+def _combine(condition, new):
+    return new if condition is None else condition & new
+
+
+def query_features(fs, stations=None, start=None, end=None, columns=None, after=None,
+                   name=FEATURE_GROUP_NAME, version=FEATURE_GROUP_VERSION):
+    """
+    Read a feature group with station, time-range and column filters pushed
+    down to the feature store instead of applied in pandas after a full read.
+
+    stations: iterable of station IDs to keep (all stations if None)
+    start / end: inclusive lower / exclusive upper bound on `hour`
+    after: exclusive lower bound on `hour` (used for incremental syncs)
+    columns: feature names to select (all features if None)
+    """
+    fg = fs.get_feature_group(name, version=version)
+    query = fg.select(list(columns)) if columns else fg.select_all()
+
+    condition = None
+    if stations is not None:
+        condition = _combine(condition, fg.start_station_id.isin(list(stations)))
+    if start is not None:
+        condition = _combine(condition, fg.hour >= pd.Timestamp(start))
+    if after is not None:
+        condition = _combine(condition, fg.hour > pd.Timestamp(after))
+    if end is not None:
+        condition = _combine(condition, fg.hour < pd.Timestamp(end))
+    if condition is not None:
+        query = query.filter(condition)
+
+    return query.read()
+
+
+def commit_history(fs, name=FEATURE_GROUP_NAME, version=FEATURE_GROUP_VERSION):
+    """{commit id: commit details} of a feature group, or None when it keeps no history."""
+    try:
+        return fs.get_feature_group(name, version=version).commit_details() or None
+    except Exception:
+        return None
+
+
+def sync_feature_cache(fs, name=FEATURE_GROUP_NAME, version=FEATURE_GROUP_VERSION, cache=None):
+    """Bring the local cache of a feature group up to date (at most once per process)."""
+    cache = cache or FeatureCache()
+    if (cache.root, name, version) in _synced:
+        return cache
+    cache.sync(name, version, lambda after: query_features(fs, after=after, name=name, version=version),
+               commits=lambda: commit_history(fs, name=name, version=version))
+    _synced.add((cache.root, name, version))
+    return cache
+
+
+def read_features(fs, stations=None, start=None, end=None, columns=None,
+                  name=FEATURE_GROUP_NAME, version=FEATURE_GROUP_VERSION, use_cache=None):
+    """
+    Read features for the given stations, hour range and columns.
+
+    With the feature cache enabled the cache is synced incrementally first and
+    the read is served from local Parquet; otherwise the filters are pushed
+    down to the feature store query.
+    """
+    if use_cache is None:
+        use_cache = USE_FEATURE_CACHE
+    if use_cache:
+        cache = sync_feature_cache(fs, name=name, version=version)
+        return cache.read(name, version, stations=stations, start=start, end=end, columns=columns)
+    return query_features(fs, stations=stations, start=start, end=end, columns=columns,
+                          name=name, version=version)
+
+
+def read_latest_features(fs, stations, n_rows, columns=RIDE_COLUMNS, lookback_days=LATEST_LOOKBACK_DAYS,
+                         name=FEATURE_GROUP_NAME, version=FEATURE_GROUP_VERSION):
+    """
+    Read at least the newest `n_rows` rows for each station.
+
+    Only the last `lookback_days` are requested first; stations that come back
+    short (e.g. long outages) are re-read without the time filter.
+    """
+    start = pd.Timestamp.now(tz="UTC").floor("D") - pd.Timedelta(days=lookback_days)
+    df = read_features(fs, stations=stations, start=start, columns=columns, name=name, version=version)
+
+    counts = df["start_station_id"].value_counts()
+    short = [s for s in stations if counts.get(s, 0) < n_rows]
+    if short:
+        print(f"⚠️ Fewer than {n_rows} recent rows for {short}, reading full history.")
+        full = read_features(fs, stations=short, columns=columns, name=name, version=version)
+        df = pd.concat([df[~df["start_station_id"].isin(short)], full], ignore_index=True)
+
+    return df
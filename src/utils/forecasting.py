@@ -0,0 +1,267 @@
+import numpy as np
+import pandas as pd
+
+from src.features.hourly_grid import dense_hourly_grid, first_observed_index, grid_to_frame, train_mask
+from src.utils.fast_predict import fast_predictor
+
+N_LAGS = 28
+FUTURE_PERIODS = 168
+
+
+def lag_columns(n_lags=N_LAGS):
+    """Return the lag feature names used by every model: lag_1 .. lag_n."""
+    return [f"lag_{i}" for i in range(1, n_lags + 1)]
+
+
+def station_histories(df, stations, n_lags=N_LAGS):
+    """
+    Collect the last `n_lags` hourly ride counts (on the dense hourly grid, so
+    hours without rows count as zero) up to each station's newest hour.
+    Stations with fewer than `n_lags` hours since their first ride are skipped.
+    """
+    histories, last_hours = {}, {}
+    df = df[df["start_station_id"].isin(stations)]
+    if df.empty:
+        print(f"⚠️ No history for {list(stations)}, skipping.")
+        return histories, last_hours
+
+    grid_stations, hours, counts = dense_hourly_grid(df, stations=stations)
+    first_observed = first_observed_index(counts)
+    newest = df.groupby("start_station_id")["hour"].max()
+    for i, station_id in enumerate(grid_stations):
+        if station_id not in newest.index:
+            print(f"⚠️ Not enough history for {station_id} (0 hours), skipping.")
+            continue
+        end = hours.get_loc(newest[station_id]) + 1
+        if end - first_observed[i] < n_lags:
+            print(f"⚠️ Not enough history for {station_id} ({max(0, end - first_observed[i])} hours), skipping.")
+            continue
+        histories[station_id] = counts[i, end - n_lags:end].copy()
+        last_hours[station_id] = hours[end - 1]
+    return histories, last_hours
+
+
+def test_lag_frame(df, stations, n_lags=N_LAGS, train_fraction=0.8):
+    """
+    Each station's test slice as lag rows (start_station_id, hour, rides, lag_1..lag_n),
+    built on the dense hourly grid with the same per-station split as training.
+    """
+    grid_stations, hours, counts = dense_hourly_grid(df, stations=stations)
+    frame = grid_to_frame(grid_stations, hours, counts, n_lags, first_observed_index(counts) + n_lags)
+    return frame[~train_mask(frame, train_fraction)].reset_index(drop=True)
+
+
+class LagRingBuffer:
+    """
+    Sliding window of the last `n_lags` hourly values for many stations at once.
+
+    Values live in a preallocated (n_stations, n_lags) array. Pushing a new hour
+    overwrites the oldest slot in place, so no frame ever grows during a forecast.
+    """
+
+    def __init__(self, history):
+        self._buffer = np.array(history, dtype=np.float64)
+        self.n_stations, self.n_lags = self._buffer.shape
+        self._head = 0  # slot holding the oldest value, i.e. the next one to overwrite
+        self._offsets = np.arange(1, self.n_lags + 1)
+
+    def lags(self, lags=None, rows=None):
+        """
+        Return the lag matrix for `rows` (all stations by default).
+        Column j holds lag_{lags[j]}; only the requested lags are gathered.
+        """
+        offsets = self._offsets if lags is None else np.asarray(lags)
+        cols = (self._head - offsets) % self.n_lags
+        if rows is None:
+            return self._buffer[:, cols]
+        return self._buffer[np.ix_(rows, cols)]
+
+    def push(self, values):
+        """Append one new hourly value per station, dropping the oldest."""
+        self._buffer[:, self._head] = values
+        self._head = (self._head + 1) % self.n_lags
+
+
+class LagPredictor:
+    """
+    Adapt a fitted regressor to the forecaster's lag-matrix interface.
+
+    `lags` lists the lag numbers the model was trained on, in column order.
+    `backend` picks the FastPredictor backend (PREDICT_BACKEND by default).
+    """
+
+    def __init__(self, model, lags=None, n_lags=N_LAGS, backend=None):
+        self.model = fast_predictor(model, backend)
+        self.lags = list(lags) if lags is not None else list(range(1, n_lags + 1))
+        self.columns = [f"lag_{i}" for i in self.lags]
+
+    def __call__(self, lag_matrix, stations, hours):
+        return self.model.predict(lag_matrix)
+
+
+class ProjectionPredictor:
+    """
+    Forecast with a fitted (pca -> regressor) Pipeline.
+
+    The PCA step is folded into one affine map, lags @ weights + bias, computed
+    once up front, so each forecast step is a single matrix multiply instead of
+    a DataFrame build plus PCA.transform.
+    """
+
+    def __init__(self, pipeline, n_lags=N_LAGS, backend=None):
+        pca = pipeline.named_steps["pca"]
+        weights = pca.components_.T
+        if pca.whiten:
+            weights = weights / np.sqrt(pca.explained_variance_)
+        self.model = fast_predictor(pipeline.named_steps["model"], backend)
+        self.weights = weights
+        self.bias = -pca.mean_ @ weights
+        self.lags = list(range(1, n_lags + 1))
+
+    def __call__(self, lag_matrix, stations, hours):
+        return self.model.predict(lag_matrix @ self.weights + self.bias)
+
+
+def recursive_forecast(predictors, histories, last_hours, horizon=FUTURE_PERIODS, n_lags=N_LAGS):
+    """
+    Forecast `horizon` hours ahead for all stations together, feeding every
+    prediction back as the newest lag for the next step.
+
+    predictors: station_id -> predictor. Stations that share one predictor object
+        are predicted with a single batched call per step.
+    histories: station_id -> at least `n_lags` past hourly rides, oldest first.
+    last_hours: station_id -> timestamp of the newest history value.
+
+    Returns a long DataFrame with station_id, hour and predicted_rides.
+    """
+    stations = list(histories)
+    if not stations:
+        return pd.DataFrame(columns=["station_id", "hour", "predicted_rides"])
+
+    buffer = LagRingBuffer(np.vstack([np.asarray(histories[s], dtype=np.float64)[-n_lags:] for s in stations]))
+    station_ids = np.asarray(stations, dtype=object)
+    base_hours = pd.DatetimeIndex([last_hours[s] for s in stations])
+    step_offsets = pd.to_timedelta(np.arange(1, horizon + 1), unit="h")
+
+    # Group rows by predictor so each step issues one predict call per distinct model
+    groups = {}
+    for row, station_id in enumerate(stations):
+        predictor = predictors[station_id]
+        groups.setdefault(id(predictor), (predictor, []))[1].append(row)
+    groups = [(predictor, np.asarray(rows)) for predictor, rows in groups.values()]
+
+    forecasts = np.empty((len(stations), horizon), dtype=np.float64)
+    for step in range(horizon):
+        hours = base_hours + step_offsets[step]
+        for predictor, rows in groups:
+            X = buffer.lags(predictor.lags, rows)
+            forecasts[rows, step] = predictor(X, station_ids[rows], hours[rows])
+        buffer.push(forecasts[:, step])
+
+    return pd.DataFrame({
+        "station_id": np.repeat(station_ids, horizon),
+        "hour": base_hours.repeat(horizon) + np.tile(step_offsets, len(stations)),
+        "predicted_rides": forecasts.ravel(),
+    })
+
+
+# Features of the direct multi-horizon model: the origin's lag window, the horizon
+# and the calendar position of the hour being predicted
+DIRECT_EXTRA_FEATURES = ["horizon", "hour_of_day", "day_of_week"]
+
+
+def direct_feature_columns(n_lags=N_LAGS):
+    return lag_columns(n_lags) + DIRECT_EXTRA_FEATURES
+
+
+def direct_feature_matrix(lag_matrix, first_hours, horizons):
+    """
+    Pair every lag row with every horizon. Row r * len(horizons) + j is lag row r
+    at horizon horizons[j]; first_hours[r] is the hour horizon 1 predicts, so the
+    target hour is first_hours[r] + (horizons[j] - 1) hours.
+    """
+    lag_matrix = np.asarray(lag_matrix, dtype=np.float64)
+    horizons = np.asarray(horizons, dtype=np.int64)
+    n_rows, n_horizons = len(lag_matrix), len(horizons)
+    targets = pd.DatetimeIndex(first_hours).repeat(n_horizons) + pd.to_timedelta(
+        np.tile(horizons - 1, n_rows), unit="h"
+    )
+    return np.column_stack([
+        np.repeat(lag_matrix, n_horizons, axis=0),
+        np.tile(horizons, n_rows),
+        targets.hour.to_numpy(),
+        targets.dayofweek.to_numpy(),
+    ])
+
+
+def direct_forecast(models, histories, last_hours, horizon=FUTURE_PERIODS, n_lags=N_LAGS, backend=None):
+    """
+    Forecast `horizon` hours ahead with direct multi-horizon models: one predict
+    per station covers the whole horizon, with no step feeding the next.
+
+    models: station_id -> fitted model taking direct_feature_columns(n_lags).
+    Returns the same long DataFrame as recursive_forecast.
+    """
+    horizons = np.arange(1, horizon + 1)
+    frames = []
+    for station_id, model in models.items():
+        lag_row = np.asarray(histories[station_id], dtype=np.float64)[-n_lags:][::-1]  # lag_1 = newest
+        first_hour = pd.Timestamp(last_hours[station_id]) + pd.Timedelta(hours=1)
+        X = direct_feature_matrix(lag_row[None, :], [first_hour], horizons)
+        frames.append(pd.DataFrame({
+            "station_id": station_id,
+            "hour": first_hour + pd.to_timedelta(horizons - 1, unit="h"),
+            "predicted_rides": fast_predictor(model, backend).predict(X),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=["station_id", "hour", "predicted_rides"])
+    return pd.concat(frames, ignore_index=True)
+
+
+# Features of the single cross-station model: the lag window plus station and calendar codes
+GLOBAL_CATEGORICAL_FEATURES = ["station_code", "hour_of_day", "day_of_week"]
+
+
+def global_feature_matrix(lag_matrix, stations, hours, station_codes, out=None):
+    """
+    The global model's input as a float array: lag_1..lag_n, the station's
+    integer code (-1, i.e. missing, for stations unseen in training) and the
+    target hour's hour of day and day of week. Written into `out` when given.
+    """
+    lag_matrix = np.asarray(lag_matrix, dtype=np.float64)
+    n_rows, n_lags = lag_matrix.shape
+    if out is None:
+        out = np.empty((n_rows, n_lags + 3), dtype=np.float64)
+    hours = pd.DatetimeIndex(hours)
+    out[:, :n_lags] = lag_matrix
+    out[:, n_lags] = [station_codes.get(s, -1) for s in stations]
+    out[:, n_lags + 1] = hours.hour
+    out[:, n_lags + 2] = hours.dayofweek
+    return out
+
+
+def global_feature_frame(lag_matrix, stations, hours, station_codes, n_lags=N_LAGS):
+    """global_feature_matrix as a DataFrame with named columns, for training."""
+    X = pd.DataFrame(np.asarray(lag_matrix, dtype=np.float64), columns=lag_columns(n_lags))
+    hours = pd.DatetimeIndex(hours)
+    X["station_code"] = np.array([station_codes.get(s, -1) for s in stations], dtype=np.int64)
+    X["hour_of_day"] = hours.hour.to_numpy()
+    X["day_of_week"] = hours.dayofweek.to_numpy()
+    return X
+
+
+class GlobalPredictor:
+    """Serve every station from one model trained across stations."""
+
+    def __init__(self, model, stations, n_lags=N_LAGS, backend=None):
+        self.model = fast_predictor(model, backend)
+        self.n_lags = n_lags
+        self.lags = list(range(1, n_lags + 1))
+        self.station_codes = {s: i for i, s in enumerate(stations)}
+        self._inputs = {}  # row count -> preallocated feature matrix, reused every forecast step
+
+    def __call__(self, lag_matrix, stations, hours):
+        out = self._inputs.get(len(stations))
+        if out is None:
+            out = self._inputs[len(stations)] = np.empty((len(stations), self.n_lags + 3), dtype=np.float64)
+        return self.model.predict(global_feature_matrix(lag_matrix, stations, hours, self.station_codes, out))
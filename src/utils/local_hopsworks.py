@@ -0,0 +1,335 @@
+"""
+File-backed stand-in for the parts of the Hopsworks client this project uses.
+
+Feature groups are stored as Parquet files and models as plain directories
+under LOCAL_STORE_DIR, so the whole pipeline can run (and be benchmarked)
+without a Hopsworks cluster. Select it by setting HOPSWORKS_OFFLINE=1; see
+src.utils.feature_store.login().
+
+Seed the feature store from an engineered features file with:
+    python src/utils/local_hopsworks.py --seed data/processed/jc_hourly_features.csv
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+
+LOCAL_STORE_DIR = os.getenv("LOCAL_STORE_DIR", "data/local_hopsworks")
+
+
+# ---------------- FILTERS ----------------
+class LocalFilter:
+    """Row predicate mirroring hsfs Filter/Logic objects; combine with & and |."""
+
+    def __init__(self, fn):
+        self._fn = fn
+
+    def __call__(self, df):
+        return self._fn(df)
+
+    def __and__(self, other):
+        return LocalFilter(lambda df: self(df) & other(df))
+
+    def __or__(self, other):
+        return LocalFilter(lambda df: self(df) | other(df))
+
+
+def _coerce(series, value):
+    """Compare timestamps in the column's timezone, like the feature store does."""
+    if isinstance(value, (pd.Timestamp,)) and pd.api.types.is_datetime64_any_dtype(series):
+        tz = getattr(series.dt, "tz", None)
+        if tz is not None:
+            return value.tz_localize(tz) if value.tzinfo is None else value.tz_convert(tz)
+        return value.tz_localize(None) if value.tzinfo is None else value.tz_convert("UTC").tz_localize(None)
+    return value
+
+
+class LocalFeature:
+    def __init__(self, name):
+        self.name = name
+
+    def _compare(self, op, value):
+        return LocalFilter(lambda df: getattr(df[self.name], op)(_coerce(df[self.name], value)))
+
+    def __eq__(self, value):
+        return self._compare("eq", value)
+
+    def __ne__(self, value):
+        return self._compare("ne", value)
+
+    def __lt__(self, value):
+        return self._compare("lt", value)
+
+    def __le__(self, value):
+        return self._compare("le", value)
+
+    def __gt__(self, value):
+        return self._compare("gt", value)
+
+    def __ge__(self, value):
+        return self._compare("ge", value)
+
+    def isin(self, values):
+        values = list(values)
+        return LocalFilter(lambda df: df[self.name].isin(values))
+
+    __hash__ = object.__hash__
+
+
+# ---------------- FEATURE STORE ----------------
+class LocalQuery:
+    def __init__(self, fg, columns=None, condition=None):
+        self._fg = fg
+        self._columns = columns
+        self._condition = condition
+
+    def filter(self, condition):
+        if self._condition is not None:
+            condition = self._condition & condition
+        return LocalQuery(self._fg, self._columns, condition)
+
+    def read(self):
+        df = self._fg.read()
+        if self._condition is not None and not df.empty:
+            df = df[self._condition(df)]
+        if self._columns:
+            df = df[self._columns]
+        return df.reset_index(drop=True)
+
+
+class LocalFeatureGroup:
+    def __init__(self, path, name, version, primary_key=None, event_time=None, description=""):
+        self.path = path
+        self.name = name
+        self.version = version
+        self.primary_key = list(primary_key or [])
+        self.event_time = event_time
+        self.description = description
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, "_metadata.json")) as f:
+            meta = json.load(f)
+        return cls(path, **meta)
+
+    def _save_metadata(self):
+        os.makedirs(self.path, exist_ok=True)
+        meta = {
+            "name": self.name,
+            "version": self.version,
+            "primary_key": self.primary_key,
+            "event_time": self.event_time,
+            "description": self.description,
+        }
+        with open(os.path.join(self.path, "_metadata.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def _parts(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(
+            os.path.join(self.path, f) for f in os.listdir(self.path) if f.endswith(".parquet")
+        )
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return LocalFeature(name)
+
+    def select(self, columns):
+        return LocalQuery(self, list(columns))
+
+    def select_all(self):
+        return LocalQuery(self)
+
+    def filter(self, condition):
+        return LocalQuery(self, condition=condition)
+
+    def read(self):
+        parts = self._parts()
+        if not parts:
+            return pd.DataFrame()
+        df = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+        if self.primary_key:
+            # Later inserts win, like an upsert on the primary key
+            df = df.drop_duplicates(subset=self.primary_key, keep="last")
+        return df.reset_index(drop=True)
+
+    def _keys(self, df):
+        keys = df[self.primary_key] if self.primary_key else df
+        return pd.MultiIndex.from_frame(keys.drop_duplicates())
+
+    def insert(self, df, write_options=None, operation="upsert", **kwargs):
+        write_options = write_options or {}
+        existing = self._keys(self.read()) if self._parts() else None
+        new_keys = self._keys(df)
+        deleted = 0
+        if write_options.get("write_mode") == "overwrite":
+            for part in self._parts():
+                os.remove(part)
+            deleted, existing = (0 if existing is None else len(existing)), None
+        inserted = len(new_keys) if existing is None else int((~new_keys.isin(existing)).sum())
+
+        os.makedirs(self.path, exist_ok=True)
+        commit_id = time.time_ns()
+        part = os.path.join(self.path, f"part-{commit_id:020d}.parquet")
+        df.reset_index(drop=True).to_parquet(part, index=False)
+        self._log_commit(commit_id, inserted, len(new_keys) - inserted, deleted)
+        return None, None
+
+    def _log_commit(self, commit_id, inserted, updated, deleted):
+        commits = self.commit_details()
+        commits[commit_id] = {
+            "committedOn": pd.Timestamp(commit_id, unit="ns", tz="UTC").strftime("%Y%m%d%H%M%S"),
+            "rowsInserted": inserted,
+            "rowsUpdated": updated,
+            "rowsDeleted": deleted,
+        }
+        with open(os.path.join(self.path, "_commits.json"), "w") as f:
+            json.dump({str(cid): details for cid, details in commits.items()}, f, indent=2)
+
+    def commit_details(self, wallclock_time=None, limit=None):
+        """{commit id: row counts} of every insert, newest first, like hsfs commit details."""
+        try:
+            with open(os.path.join(self.path, "_commits.json")) as f:
+                commits = {int(cid): details for cid, details in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        newest_first = sorted(commits, reverse=True)[:limit]
+        return {cid: commits[cid] for cid in newest_first}
+
+
+class LocalFeatureStore:
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, name, version):
+        return os.path.join(self.root, f"{name}_{version}")
+
+    def get_feature_group(self, name, version=None):
+        version = version or 1
+        path = self._path(name, version)
+        if not os.path.exists(os.path.join(path, "_metadata.json")):
+            raise FileNotFoundError(f"Feature group {name} v{version} not found in {self.root}")
+        return LocalFeatureGroup.load(path)
+
+    def get_or_create_feature_group(self, name, version=None, primary_key=None, event_time=None,
+                                    description="", **kwargs):
+        version = version or 1
+        path = self._path(name, version)
+        if os.path.exists(os.path.join(path, "_metadata.json")):
+            return LocalFeatureGroup.load(path)
+        fg = LocalFeatureGroup(path, name, version, primary_key, event_time, description)
+        fg._save_metadata()
+        return fg
+
+
+# ---------------- MODEL REGISTRY ----------------
+class LocalModel:
+    def __init__(self, registry, name, version=None, metrics=None, description=""):
+        self._registry = registry
+        self.name = name
+        self.version = version
+        self.training_metrics = metrics or {}
+        self.description = description
+
+    @property
+    def _path(self):
+        return os.path.join(self._registry.root, self.name, str(self.version))
+
+    def save(self, model_path):
+        """Register `model_path` (a file or directory) as the next version of this model."""
+        self.version = self._registry._latest_version(self.name) + 1
+        os.makedirs(self._path)
+        if os.path.isdir(model_path):
+            shutil.copytree(model_path, self._path, dirs_exist_ok=True)
+        else:
+            shutil.copy2(model_path, self._path)
+        with open(os.path.join(self._path, "_metadata.json"), "w") as f:
+            json.dump({"metrics": self.training_metrics, "description": self.description}, f, indent=2)
+        return self
+
+    def download(self):
+        return self._path
+
+
+class _LocalModelFactory:
+    def __init__(self, registry):
+        self._registry = registry
+
+    def create_model(self, name, metrics=None, description="", **kwargs):
+        return LocalModel(self._registry, name, metrics=metrics, description=description)
+
+
+class LocalModelRegistry:
+    def __init__(self, root):
+        self.root = root
+        self.python = self.sklearn = _LocalModelFactory(self)
+
+    def _latest_version(self, name):
+        path = os.path.join(self.root, name)
+        if not os.path.isdir(path):
+            return 0
+        versions = [int(v) for v in os.listdir(path) if v.isdigit()]
+        return max(versions, default=0)
+
+    def get_models(self, name):
+        path = os.path.join(self.root, name)
+        if not os.path.isdir(path):
+            return []
+        return [LocalModel(self, name, int(v)) for v in sorted(os.listdir(path), key=int) if v.isdigit()]
+
+    def get_model(self, name, version=None):
+        version = version or self._latest_version(name)
+        if not version or not os.path.isdir(os.path.join(self.root, name, str(version))):
+            raise FileNotFoundError(f"Model {name} v{version} not found in {self.root}")
+        return LocalModel(self, name, version)
+
+
+# ---------------- PROJECT ----------------
+class LocalProject:
+    def __init__(self, root=LOCAL_STORE_DIR):
+        self.root = root
+        self.name = os.path.basename(os.path.abspath(root))
+
+    def get_feature_store(self):
+        return LocalFeatureStore(os.path.join(self.root, "feature_store"))
+
+    def get_model_registry(self):
+        return LocalModelRegistry(os.path.join(self.root, "models"))
+
+
+def login(root=LOCAL_STORE_DIR, **kwargs):
+    """Drop-in for hopsworks.login(); credentials are accepted and ignored."""
+    print(f"🗄️ Using local Hopsworks stand-in at {root}")
+    return LocalProject(root)
+
+
+def seed_features(csv_path, root=LOCAL_STORE_DIR):
+    """Load an engineered features CSV into the local citibike_features_dataset."""
+    df = pd.read_csv(csv_path, parse_dates=["hour"])
+    df["hour"] = pd.to_datetime(df["hour"]).dt.tz_localize("UTC")
+    df["start_station_id"] = df["start_station_id"].astype(str)
+    fs = login(root).get_feature_store()
+    fg = fs.get_or_create_feature_group(
+        name="citibike_features_dataset",
+        version=1,
+        primary_key=["start_station_id", "hour"],
+        event_time="hour",
+    )
+    fg.insert(df, write_options={"write_mode": "overwrite"})
+    print(f"✅ Seeded {len(df)} rows into {fg.path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local Hopsworks stand-in.")
+    parser.add_argument("--seed", metavar="CSV", help="engineered features CSV to load")
+    parser.add_argument("--root", default=LOCAL_STORE_DIR)
+    args = parser.parse_args()
+    if args.seed:
+        seed_features(args.seed, args.root)
+    else:
+        parser.print_help()
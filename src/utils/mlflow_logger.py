@@ -1,14 +1,31 @@
 from dotenv import load_dotenv
 load_dotenv()
+import atexit
 import logging
+import multiprocessing.util
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import mlflow
+from mlflow.entities import Metric, Param
 from mlflow.models import infer_signature
+from mlflow.tracking import MlflowClient
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Lightweight mode (default): signature from a sample, a capped input_example and
+# one log_batch call for params and metrics. MLFLOW_LIGHTWEIGHT=0 restores the full path.
+LIGHTWEIGHT_LOGGING = os.getenv("MLFLOW_LIGHTWEIGHT", "1") != "0"
+# MLFLOW_ASYNC_LOGGING=1 logs on a background thread so training never waits on the tracking server
+ASYNC_LOGGING = os.getenv("MLFLOW_ASYNC_LOGGING", "0") == "1"
+SIGNATURE_SAMPLE_ROWS = 100
+INPUT_EXAMPLE_ROWS = 5
+
+_executor = None
+_pending = []
+
 
 def set_mlflow_tracking():
     """
@@ -20,32 +37,37 @@ def set_mlflow_tracking():
     return mlflow
 
 
-def log_model_to_mlflow(
-    model,
-    input_data,
-    experiment_name,
-    metric_name="mae",
-    model_name=None,
-    params=None,
-    score=None,
-):
-    """
-    Log model, metrics, and optionally register the model in MLflow.
-    """
+def _head(input_data, n_rows):
+    return input_data.head(n_rows) if hasattr(input_data, "head") else input_data[:n_rows]
+
+
+def _log_run(model, input_data, experiment_name, metric_name, model_name, params, score, lightweight):
     try:
         mlflow.set_experiment(experiment_name)
         logger.info(f"Experiment set to: {experiment_name}")
 
-        with mlflow.start_run():
-            if params:
-                mlflow.log_params(params)
-                logger.info(f"Logged parameters: {params}")
+        with mlflow.start_run() as run:
+            if lightweight:
+                # Params and the score in one round trip instead of one call each
+                MlflowClient().log_batch(
+                    run.info.run_id,
+                    metrics=[Metric(metric_name, score, int(time.time() * 1000), 0)] if score is not None else [],
+                    params=[Param(key, str(value)) for key, value in (params or {}).items()],
+                )
+                logger.info(f"Logged {len(params or {})} parameters and {metric_name}: {score}")
+                signature_data = _head(input_data, SIGNATURE_SAMPLE_ROWS)
+                input_example = _head(input_data, INPUT_EXAMPLE_ROWS)
+            else:
+                if params:
+                    mlflow.log_params(params)
+                    logger.info(f"Logged parameters: {params}")
 
-            if score is not None:
-                mlflow.log_metric(metric_name, score)
-                logger.info(f"Logged {metric_name}: {score}")
+                if score is not None:
+                    mlflow.log_metric(metric_name, score)
+                    logger.info(f"Logged {metric_name}: {score}")
+                signature_data = input_example = input_data
 
-            signature = infer_signature(input_data, model.predict(input_data))
+            signature = infer_signature(signature_data, model.predict(signature_data))
             logger.info("Model signature inferred.")
 
             if not model_name:
@@ -55,7 +77,7 @@ def log_model_to_mlflow(
                 sk_model=model,
                 artifact_path="model_artifact",
                 signature=signature,
-                input_example=input_data,
+                input_example=input_example,
                 registered_model_name=model_name,
             )
             logger.info(f"Model logged with name: {model_name}")
@@ -64,3 +86,63 @@ def log_model_to_mlflow(
     except Exception as e:
         logger.error(f"Error logging to MLflow: {e}")
         raise
+
+
+def _reset_after_fork():
+    # A forked child inherits the executor object but not its thread, so anything
+    # submitted to it would never run; children start with their own executor
+    global _executor
+    _executor = None
+    _pending.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _background_executor():
+    global _executor
+    if _executor is None:
+        # One thread keeps runs in submission order; flush before the interpreter
+        # exits, including process-pool workers, which skip atexit handlers
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mlflow-logger")
+        atexit.register(flush_mlflow_logging)
+        multiprocessing.util.Finalize(None, flush_mlflow_logging, exitpriority=10)
+    return _executor
+
+
+def flush_mlflow_logging():
+    """Wait for queued background runs; re-raises the first logging error."""
+    errors = []
+    while _pending:
+        try:
+            _pending.pop(0).result()
+        except Exception as e:
+            errors.append(e)
+    if errors:
+        raise errors[0]
+
+
+def log_model_to_mlflow(
+    model,
+    input_data,
+    experiment_name,
+    metric_name="mae",
+    model_name=None,
+    params=None,
+    score=None,
+    lightweight=None,
+    asynchronous=None,
+):
+    """
+    Log model, metrics, and optionally register the model in MLflow.
+    Returns the ModelInfo, or a Future of it when logging asynchronously.
+    """
+    lightweight = LIGHTWEIGHT_LOGGING if lightweight is None else lightweight
+    asynchronous = ASYNC_LOGGING if asynchronous is None else asynchronous
+    args = (model, input_data, experiment_name, metric_name, model_name, params, score, lightweight)
+
+    if not asynchronous:
+        return _log_run(*args)
+    future = _background_executor().submit(_log_run, *args)
+    _pending.append(future)
+    return future
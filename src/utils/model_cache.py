@@ -0,0 +1,98 @@
+"""
+Local content-addressed cache of registry model artifacts.
+
+A model version is downloaded once and stored under
+MODEL_CACHE_DIR/objects/<sha256 of its files>/. index.json maps
+"<name>:<version>" to that digest, so later lookups of the same version, from
+this process or from the next inference script, only ask the registry which
+version is latest. Deserialized models are also kept in an in-process LRU.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+
+import joblib
+
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "data/cache/models")
+MODEL_LRU_SIZE = int(os.getenv("MODEL_LRU_SIZE", "32"))
+INDEX_FILE = "index.json"
+
+
+def _digest_dir(path):
+    """sha256 over every file's relative path and bytes, in sorted order."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for file_name in sorted(files):
+            file_path = os.path.join(root, file_name)
+            digest.update(os.path.relpath(file_path, path).replace(os.sep, "/").encode())
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=MODEL_LRU_SIZE)
+def _load_object(path):
+    # Paths are content-addressed, so a cached object can never go stale
+    return joblib.load(path)
+
+
+class ModelCache:
+    def __init__(self, root=MODEL_CACHE_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, INDEX_FILE)
+
+    def _read_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path) as f:
+            return json.load(f)
+
+    def _write_index(self, index):
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def latest_version(mr, name):
+        """Newest registered version, from registry metadata only (nothing is downloaded)."""
+        return max(model.version for model in mr.get_models(name))
+
+    def fetch(self, mr, name, version=None):
+        """Return a local directory holding `name` at `version` (latest by default)."""
+        version = version or self.latest_version(mr, name)
+        key = f"{name}:{version}"
+        index = self._read_index()
+        digest = index.get(key)
+        if digest and os.path.isdir(os.path.join(self.objects_dir, digest)):
+            return os.path.join(self.objects_dir, digest)
+
+        print(f"⬇️ Downloading {key} from the model registry...")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.root)
+        try:
+            downloaded = mr.get_model(name, version=version).download()
+            shutil.copytree(downloaded, os.path.join(staging, "model"))
+            digest = _digest_dir(os.path.join(staging, "model"))
+            target = os.path.join(self.objects_dir, digest)
+            if not os.path.isdir(target):
+                os.replace(os.path.join(staging, "model"), target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        # Re-read so concurrent scripts do not drop each other's entries
+        index = self._read_index()
+        index[key] = digest
+        self._write_index(index)
+        return target
+
+    def load(self, mr, name, version=None, filename="model.pkl"):
+        """Deserialize `filename` from a cached model version; returns (object, model_dir)."""
+        model_dir = self.fetch(mr, name, version)
+        return _load_object(os.path.join(model_dir, filename)), model_dir
@@ -0,0 +1,77 @@
+import os
+import joblib
+from sklearn.pipeline import Pipeline
+
+from src.utils.feature_manifest import FeatureManifest
+from src.utils.model_cache import ModelCache
+
+# Serve model loads from the local artifact cache unless MODEL_CACHE=0
+USE_MODEL_CACHE = os.getenv("MODEL_CACHE", "1") != "0"
+
+# name -> registry version of the last load in this process, for tagging outputs
+_loaded_versions = {}
+
+
+def register_model(mr, name, model_dir, metrics=None, description=""):
+    """Upload a model directory (model.pkl plus any metadata) as a new registry version."""
+    model = mr.python.create_model(name=name, metrics=metrics or {}, description=description)
+    model.save(model_dir)
+    print(f"📦 Registered {name} v{model.version}")
+    return model
+
+
+def load_model(mr, name, version=None, filename="model.pkl", use_cache=None):
+    """
+    Load a registered model (latest version by default); returns (model, model_dir).
+    Through the cache, a version is downloaded at most once and deserialized once per process.
+    """
+    if use_cache is None:
+        use_cache = USE_MODEL_CACHE
+    if use_cache:
+        cache = ModelCache()
+        version = version or cache.latest_version(mr, name)
+        _loaded_versions[name] = version
+        return cache.load(mr, name, version=version, filename=filename)
+    model_obj = mr.get_model(name, version=version)
+    _loaded_versions[name] = model_obj.version
+    model_dir = model_obj.download()
+    return joblib.load(os.path.join(model_dir, filename)), model_dir
+
+
+def loaded_model_version(name):
+    """Registry version of `name` as last loaded by load_model in this process (None if never)."""
+    return _loaded_versions.get(name)
+
+
+# Baseline lightgbm_pca_model.py registered the regressor and the fitted PCA as separate files
+LEGACY_PCA_FILES = ("lgbm_model.pkl", "pca_transformer.pkl")
+
+
+def load_pca_pipeline(mr, name, version=None):
+    """
+    Load a registered PCA model as a (pca -> regressor) Pipeline.
+    Versions registered by the baseline script (lgbm_model.pkl + pca_transformer.pkl)
+    are assembled into the same Pipeline.
+    """
+    try:
+        model, _ = load_model(mr, name, version=version)
+    except FileNotFoundError:
+        model_file, pca_file = LEGACY_PCA_FILES
+        version = version or loaded_model_version(name)
+        try:
+            model, model_dir = load_model(mr, name, version=version, filename=model_file)
+            pca = joblib.load(os.path.join(model_dir, pca_file))
+        except FileNotFoundError:
+            raise ValueError(
+                f"{name} v{version} has neither model.pkl nor {model_file} + {pca_file}; retrain the PCA model."
+            ) from None
+        return Pipeline([("pca", pca), ("model", model)])
+    if not isinstance(model, Pipeline):
+        raise ValueError(f"{name} v{version or loaded_model_version(name)} is not a PCA pipeline; retrain the PCA model.")
+    return model
+
+
+def load_model_with_manifest(mr, name, version=None):
+    """Load a registered model together with the FeatureManifest saved beside it."""
+    model, model_dir = load_model(mr, name, version=version)
+    return model, FeatureManifest.load(model_dir, model)
@@ -0,0 +1,120 @@
+"""
+Columnar prediction outputs shared by the inference scripts and the uploader.
+
+Each script writes one Parquet file per station under
+PREDICTIONS_DIR/<prefix>/<station_id>.parquet, tagged with the run ID and
+the registry version of the model that produced it.
+"""
+import os
+
+import pandas as pd
+
+from src.utils.run_info import current_run_id
+
+PREDICTIONS_DIR = os.getenv("PREDICTIONS_DIR", "data/predictions")
+# Long-format model metrics, one file per training run: PREDICTIONS_DIR/_metrics/<run_id>.parquet
+METRICS_PREFIX = "_metrics"
+
+# (file prefix, feature group, dashboard rollups materialized with it)
+PREDICTION_GROUPS = [
+    ("predictions_lgbm_lag28", "citibike_predictions_lag28", ["daily"]),
+    ("predictions_lgbm_topk", "citibike_predictions_topk", ["daily"]),
+    ("predictions_lgbm_pca", "citibike_predictions_pca", ["daily"]),
+    ("future_lgbm_lag28", "citibike_forecast_lag28", ["6h"]),
+    ("future_lgbm_topk", "citibike_forecast_topk", ["6h"]),
+    ("future_lgbm_pca", "citibike_forecast_pca", ["6h"]),
+    ("predictions_lgbm_global", "citibike_predictions_global", ["daily"]),
+    ("future_lgbm_global", "citibike_forecast_global", ["6h"]),
+    ("future_lgbm_direct", "citibike_forecast_direct", ["6h"]),
+]
+
+
+def write_predictions(df, prefix, model_version, run_id=None, root=PREDICTIONS_DIR):
+    """
+    Write per-station prediction partitions.
+
+    df: station_id, hour, predicted_rides (and actual_rides for test-slice predictions)
+    model_version: one version for every station, or {station_id: version}
+    """
+    run_id = run_id or current_run_id()
+    out_dir = os.path.join(root, prefix)
+    os.makedirs(out_dir, exist_ok=True)
+    for station_id, station_df in df.groupby("station_id", sort=False):
+        out = station_df.reset_index(drop=True)
+        out["hour"] = pd.to_datetime(out["hour"], utc=True)
+        out["run_id"] = run_id
+        version = model_version.get(station_id) if isinstance(model_version, dict) else model_version
+        out["model_version"] = pd.array([version] * len(out), dtype="Int64")
+        out_file = os.path.join(out_dir, f"{station_id}.parquet")
+        out.to_parquet(out_file, index=False)
+        print(f"✅ Saved: {out_file}")
+
+
+def write_metrics(df, run_id, root=PREDICTIONS_DIR):
+    """Write one run's long-format metrics next to the prediction partitions."""
+    out_dir = os.path.join(root, METRICS_PREFIX)
+    os.makedirs(out_dir, exist_ok=True)
+    out_file = os.path.join(out_dir, f"{run_id}.parquet")
+    df.to_parquet(out_file, index=False)
+    print(f"✅ Saved: {out_file}")
+
+
+def prediction_partitions(prefix, root=PREDICTIONS_DIR):
+    """{station_id: parquet path} for one prediction prefix."""
+    out_dir = os.path.join(root, prefix)
+    if not os.path.isdir(out_dir):
+        return {}
+    return {
+        f[:-len(".parquet")]: os.path.join(out_dir, f)
+        for f in sorted(os.listdir(out_dir)) if f.endswith(".parquet")
+    }
+
+
+# Dashboard rollups, materialized next to each prediction group as <group>_<name>
+ROLLUPS = {"daily": "1D", "6h": "6h"}
+ROLLUP_FG_VERSION = 1
+
+
+def rollup_group_name(feature_group_name, rollup):
+    return f"{feature_group_name}_{rollup}"
+
+
+def rollup_buckets(hours, rollup_name):
+    """Start of the rollup bucket each hour falls in."""
+    return pd.to_datetime(hours, utc=True).dt.floor(ROLLUPS[rollup_name])
+
+
+def row_digests(df):
+    """
+    Hash of each prediction row, hour included. run_id is left out, so an hour a
+    rerun predicts again with the same model and inputs keeps its digest.
+    """
+    return pd.util.hash_pandas_object(df.drop(columns="run_id"), index=False).to_numpy()
+
+
+def bucket_rows(df, changed, rollup_name):
+    """Every row of df in a bucket that holds a changed row, so that bucket is re-aggregated whole."""
+    buckets = rollup_buckets(df["hour"], rollup_name)
+    return df[buckets.isin(buckets[changed]).to_numpy()]
+
+
+def rollup(df, rollup_name, complete_start=False):
+    """
+    Mean rides per station and bucket; `hour` is the bucket start and n_hours the
+    hourly rows behind it. With complete_start, a partial leading bucket is dropped
+    so an upsert cannot replace a full bucket from an earlier run with a partial one.
+    """
+    df = df.assign(hour=pd.to_datetime(df["hour"], utc=True))
+    df["bucket"] = rollup_buckets(df["hour"], rollup_name)
+    if complete_start:
+        first_full = df.groupby("station_id")["hour"].transform("min").dt.ceil(ROLLUPS[rollup_name])
+        df = df[df["bucket"] >= first_full]
+
+    value_columns = [c for c in ("predicted_rides", "actual_rides") if c in df.columns]
+    out = df.groupby(["station_id", "bucket"]).agg(
+        **{c: (c, "mean") for c in value_columns},
+        n_hours=("hour", "size"),
+        run_id=("run_id", "last"),
+        model_version=("model_version", "max"),
+    )
+    return out.reset_index().rename(columns={"bucket": "hour"})
@@ -0,0 +1,22 @@
+import os
+
+import pandas as pd
+
+_run_id = None
+
+
+def current_run_id():
+    """
+    ID shared by every output of one pipeline run: RUN_ID, or GitHub's run ID
+    and attempt so all scripts in a workflow agree; otherwise a UTC timestamp
+    fixed for the life of this process.
+    """
+    global _run_id
+    if _run_id is None:
+        if os.getenv("RUN_ID"):
+            _run_id = os.environ["RUN_ID"]
+        elif os.getenv("GITHUB_RUN_ID"):
+            _run_id = f"gh-{os.environ['GITHUB_RUN_ID']}-{os.getenv('GITHUB_RUN_ATTEMPT', '1')}"
+        else:
+            _run_id = pd.Timestamp.now(tz="UTC").strftime("local-%Y%m%dT%H%M%SZ")
+    return _run_id
@@ -0,0 +1,194 @@
+import io
+import json
+import os
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from src.data.downloader import STATE_DIR_NAME, download_and_extract, make_session
+
+CSV_NAME = "202401-citibike-tripdata.csv"
+CSV_BYTES = b"ride_id,started_at,start_station_id\n" + b"".join(
+    f"r{i},2024-01-01 00:{i % 60:02d}:00,{i % 7}\n".encode() for i in range(2000)
+)
+
+
+def make_zip():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr(CSV_NAME, CSV_BYTES)
+        zf.writestr("__MACOSX/._" + CSV_NAME, b"resource fork")
+    return buffer.getvalue()
+
+
+ZIP_NAME = "202401-citibike-tripdata.csv.zip"
+ZIP_BYTES = make_zip()
+
+
+class TripdataHandler(BaseHTTPRequestHandler):
+    """Serves server.files like the S3 bucket; server.options switches headers on and off."""
+
+    def log_message(self, *args):
+        pass
+
+    def _headers(self, body, status=200, content_range=None):
+        options = self.server.options
+        self.send_response(status)
+        if options["etag"]:
+            self.send_header("ETag", options["etag"])
+        if options["last_modified"]:
+            self.send_header("Last-Modified", options["last_modified"])
+        if options["content_length"]:
+            self.send_header("Content-Length", str(len(body)))
+        if content_range:
+            self.send_header("Content-Range", content_range)
+        self.end_headers()
+
+    def _lookup(self):
+        self.server.requests.append((self.command, self.headers.get("Range")))
+        data = self.server.files.get(self.path.lstrip("/"))
+        if data is None:
+            # S3 answers 403 for keys that do not exist
+            self.send_response(403)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        return data
+
+    def do_HEAD(self):
+        data = self._lookup()
+        if data is not None:
+            self._headers(data)
+
+    def do_GET(self):
+        data = self._lookup()
+        if data is None:
+            return
+        requested = self.headers.get("Range")
+        if requested and self.server.options["ranges"]:
+            start = int(requested.split("=")[1].split("-")[0])
+            body = data[start:]
+            self._headers(body, 206, f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            body = data
+            self._headers(body)
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), TripdataHandler)
+    httpd.files = {ZIP_NAME: ZIP_BYTES}
+    httpd.options = {"etag": '"v1"', "last_modified": None, "content_length": True, "ranges": True}
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def fetch(server, output_dir, name=ZIP_NAME):
+    server.requests.clear()
+    with make_session(1) as session:
+        return download_and_extract(session, name, str(output_dir), url_prefix=server.url)
+
+
+def gets(server):
+    return [rng for method, rng in server.requests if method == "GET"]
+
+
+def write_partial(output_dir, n_bytes, etag='"v1"'):
+    state_dir = os.path.join(output_dir, STATE_DIR_NAME)
+    os.makedirs(state_dir, exist_ok=True)
+    with open(os.path.join(state_dir, ZIP_NAME + ".part"), "wb") as f:
+        f.write(ZIP_BYTES[:n_bytes])
+    with open(os.path.join(state_dir, ZIP_NAME + ".json"), "w") as f:
+        json.dump({"etag": etag, "last_modified": None, "length": len(ZIP_BYTES)}, f)
+
+
+def assert_extracted(output_dir):
+    with open(os.path.join(output_dir, CSV_NAME), "rb") as f:
+        assert f.read() == CSV_BYTES
+    assert not os.path.exists(os.path.join(output_dir, "__MACOSX"))
+    assert not os.path.exists(os.path.join(output_dir, STATE_DIR_NAME, ZIP_NAME + ".part"))
+
+
+def test_unchanged_etag_skips_the_download(server, tmp_path):
+    assert fetch(server, tmp_path) == "downloaded"
+    assert_extracted(tmp_path)
+
+    assert fetch(server, tmp_path) == "unchanged"
+    assert gets(server) == []
+
+
+def test_changed_etag_downloads_again(server, tmp_path):
+    assert fetch(server, tmp_path) == "downloaded"
+    server.options["etag"] = '"v2"'
+    assert fetch(server, tmp_path) == "downloaded"
+    assert gets(server) == [None]
+
+
+def test_deleted_csv_downloads_again(server, tmp_path):
+    assert fetch(server, tmp_path) == "downloaded"
+    os.remove(os.path.join(tmp_path, CSV_NAME))
+    assert fetch(server, tmp_path) == "downloaded"
+    assert_extracted(tmp_path)
+
+
+def test_last_modified_stands_in_for_a_missing_etag(server, tmp_path):
+    server.options.update(etag=None, last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    assert fetch(server, tmp_path) == "downloaded"
+    assert fetch(server, tmp_path) == "unchanged"
+
+
+@pytest.mark.parametrize("missing", ["validator", "content_length"])
+def test_unknown_identity_always_downloads(server, tmp_path, missing):
+    if missing == "validator":
+        server.options["etag"] = None
+    else:
+        server.options["content_length"] = False
+    assert fetch(server, tmp_path) == "downloaded"
+    assert fetch(server, tmp_path) == "downloaded"
+    assert gets(server) == [None]
+    assert_extracted(tmp_path)
+
+
+def test_unknown_identity_discards_partial_bytes(server, tmp_path):
+    server.options["etag"] = None
+    write_partial(str(tmp_path), 1000, etag=None)
+    assert fetch(server, tmp_path) == "downloaded"
+    assert gets(server) == [None]
+    assert_extracted(tmp_path)
+
+
+def test_interrupted_download_resumes_with_range(server, tmp_path):
+    write_partial(str(tmp_path), 1000)
+    assert fetch(server, tmp_path) == "downloaded"
+    assert gets(server) == ["bytes=1000-"]
+    assert_extracted(tmp_path)
+
+
+def test_server_ignoring_range_restarts_from_zero(server, tmp_path):
+    server.options["ranges"] = False
+    write_partial(str(tmp_path), 1000)
+    assert fetch(server, tmp_path) == "downloaded"
+    assert gets(server) == ["bytes=1000-"]
+    assert_extracted(tmp_path)
+
+
+def test_partial_of_a_replaced_archive_is_discarded(server, tmp_path):
+    write_partial(str(tmp_path), 1000, etag='"v0"')
+    assert fetch(server, tmp_path) == "downloaded"
+    assert gets(server) == [None]
+    assert_extracted(tmp_path)
+
+
+def test_missing_key_reports_missing(server, tmp_path):
+    assert fetch(server, tmp_path, "209901-citibike-tripdata.csv.zip") == "missing"
+    assert gets(server) == []
+    assert not os.listdir(os.path.join(tmp_path, STATE_DIR_NAME))
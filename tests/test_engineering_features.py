@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from src.features.engineering_features import load_hourly_counts
+
+
+def write_month(root, month, started_at, stations):
+    out_dir = os.path.join(root, f"month={month}")
+    os.makedirs(out_dir, exist_ok=True)
+    trips = pd.DataFrame({"started_at": pd.to_datetime(started_at), "start_station_id": stations})
+    trips.to_parquet(os.path.join(out_dir, "part-0.parquet"), index=False)
+
+
+@pytest.fixture
+def trips_dir(tmp_path):
+    write_month(str(tmp_path), "2024-01",
+                ["2024-01-31 22:05", "2024-01-31 22:59", "2024-01-31 23:30", "2024-01-31 22:10"],
+                ["JC001", "JC001", "JC001", "JC002"])
+    write_month(str(tmp_path), "2024-02",
+                ["2024-01-31 23:45", "2024-02-01 00:00", "2024-02-01 00:15"],
+                ["JC001", "JC001", "JC002"])
+    return str(tmp_path)
+
+
+def test_counts_rides_per_station_and_hour(trips_dir):
+    hourly = load_hourly_counts(trips_dir)
+
+    expected = pd.DataFrame({
+        "start_station_id": ["JC001", "JC001", "JC001", "JC002", "JC002"],
+        "hour": pd.to_datetime(["2024-01-31 22:00", "2024-01-31 23:00", "2024-02-01 00:00",
+                                "2024-01-31 22:00", "2024-02-01 00:00"]),
+        "rides": [2, 2, 1, 1, 1],
+    })
+    pd.testing.assert_frame_equal(hourly, expected, check_dtype=False)
+
+
+def test_since_skips_older_trips(trips_dir):
+    hourly = load_hourly_counts(trips_dir, since="2024-01-31 23:00")
+
+    assert hourly["hour"].min() == pd.Timestamp("2024-01-31 23:00")
+    assert hourly["rides"].sum() == 4
+
+
+def test_empty_directory(tmp_path):
+    hourly = load_hourly_counts(str(tmp_path))
+    assert hourly.empty
+    assert list(hourly.columns) == ["start_station_id", "hour", "rides"]
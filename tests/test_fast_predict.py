@@ -0,0 +1,107 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+lgb = pytest.importorskip("lightgbm")
+
+from src.utils.fast_predict import FastPredictor, fast_predictor
+
+TOLERANCE = 1e-12
+
+
+def assert_booster_parity(model, X):
+    fast = FastPredictor(model)
+    assert fast.backend == "booster"
+    np.testing.assert_allclose(fast.predict(X), model.predict(X), rtol=0, atol=TOLERANCE)
+
+
+def test_numerical_model_matches_predict():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 6))
+    y = 2 * X[:, 0] - X[:, 1] ** 2 + rng.normal(scale=0.1, size=600)
+    model = lgb.LGBMRegressor(n_estimators=60, num_leaves=15, verbose=-1).fit(X, y)
+
+    X_test = rng.normal(size=(200, 6))
+    X_test[:10] = 0.0
+    X_test[10:20, 2] = np.nan
+    assert_booster_parity(model, X_test)
+
+
+def test_categorical_model_with_nan_matches_predict():
+    rng = np.random.default_rng(1)
+    X = np.column_stack([rng.integers(0, 10, 800).astype(float), rng.normal(size=800)])
+    X[rng.random(800) < 0.1, 0] = np.nan
+    y = np.where(np.isnan(X[:, 0]), 5.0, X[:, 0] % 3) + X[:, 1] + rng.normal(scale=0.1, size=800)
+    model = lgb.LGBMRegressor(n_estimators=40, min_child_samples=5, verbose=-1)
+    model.fit(X, y, categorical_feature=[0])
+
+    # Seen and unseen categories, negatives and NaN
+    X_test = np.column_stack([
+        np.array([0, 1, 2, 3, 9, 15, -1, np.nan] * 25, dtype=float),
+        rng.normal(size=200),
+    ])
+    assert_booster_parity(model, X_test)
+
+
+def test_categorical_model_without_nan_matches_predict():
+    rng = np.random.default_rng(5)
+    X = np.column_stack([rng.integers(0, 10, 800).astype(float), rng.normal(size=800)])
+    y = (X[:, 0] % 3) * 2 + X[:, 1] + rng.normal(scale=0.1, size=800)
+    model = lgb.LGBMRegressor(n_estimators=40, min_child_samples=5, verbose=-1)
+    model.fit(X, y, categorical_feature=[0])
+
+    # Like the global model's unseen stations (code -1): never seen in training
+    X_test = np.column_stack([
+        np.array([0, 1, 2, 9, 15, -1, -0.5, np.nan] * 25, dtype=float),
+        rng.normal(size=200),
+    ])
+    assert_booster_parity(model, X_test)
+
+
+def test_early_stopped_model_uses_best_iteration():
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(800, 5))
+    y = X[:, 0] + rng.normal(scale=1.0, size=800)
+    train, valid = lgb.Dataset(X[:600], y[:600]), lgb.Dataset(X[600:], y[600:])
+    booster = lgb.train(
+        {"objective": "regression", "learning_rate": 0.3, "verbose": -1},
+        train,
+        num_boost_round=500,
+        valid_sets=[valid],
+        callbacks=[lgb.early_stopping(5, verbose=False)],
+    )
+    assert 0 < booster.best_iteration < 500
+    assert_booster_parity(booster, rng.normal(size=(100, 5)))
+
+
+def test_other_layouts_are_copied_into_a_reused_buffer():
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(400, 3))
+    model = lgb.LGBMRegressor(n_estimators=10, verbose=-1).fit(X, X[:, 0])
+    fast = FastPredictor(model)
+
+    strided = np.asfortranarray(X[:3])
+    np.testing.assert_allclose(fast.predict(strided), model.predict(X[:3]), rtol=0, atol=TOLERANCE)
+    buffer = fast._buffers[(3, 3)]
+    frame = pd.DataFrame(X[3:6].astype(np.float32), columns=["a", "b", "c"])
+    np.testing.assert_allclose(fast.predict(frame), model.predict(X[3:6].astype(np.float32)), rtol=0, atol=TOLERANCE)
+    assert fast._buffers[(3, 3)] is buffer
+
+
+def test_sklearn_backend_and_non_lightgbm_models():
+    from sklearn.linear_model import LinearRegression
+
+    X = np.random.default_rng(4).normal(size=(50, 2))
+    linear = LinearRegression().fit(pd.DataFrame(X, columns=["lag_1", "lag_2"]), X[:, 0])
+    assert FastPredictor(linear).backend == "sklearn"
+    np.testing.assert_allclose(FastPredictor(linear).predict(X), X[:, 0], atol=1e-9)
+
+    with pytest.raises(ValueError):
+        FastPredictor(linear, backend="native")
+
+
+def test_fast_predictor_is_shared_per_model():
+    X = np.random.default_rng(4).normal(size=(200, 3))
+    model = lgb.LGBMRegressor(n_estimators=5, verbose=-1).fit(X, X[:, 0])
+    assert fast_predictor(model) is fast_predictor(model, "booster")
+    assert fast_predictor(model, "sklearn") is not fast_predictor(model)
@@ -0,0 +1,95 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from src.utils import feature_store
+from src.utils.feature_cache import FeatureCache
+from src.utils.local_hopsworks import LocalFeatureStore
+
+NAME, VERSION = "citibike_features_dataset", 1
+KEYS = ["start_station_id", "hour"]
+
+
+def hourly(start, hours, stations=("JC001", "JC002"), rides=1):
+    hour = pd.date_range(start, periods=hours, freq="h", tz="UTC")
+    return pd.concat(
+        [pd.DataFrame({"start_station_id": s, "hour": hour, "rides": rides}) for s in stations],
+        ignore_index=True,
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    fs = LocalFeatureStore(str(tmp_path / "store"))
+    fg = fs.get_or_create_feature_group(NAME, version=VERSION, primary_key=KEYS, event_time="hour")
+    fg.insert(hourly("2024-03-01", 24 * 20))
+    return fs, fg, FeatureCache(str(tmp_path / "cache"))
+
+
+def sync(fs, cache):
+    feature_store._synced.clear()
+    feature_store.sync_feature_cache(fs, name=NAME, version=VERSION, cache=cache)
+
+
+def assert_cache_matches(fs, cache):
+    expected = fs.get_feature_group(NAME, version=VERSION).read()
+    expected["hour"] = pd.to_datetime(expected["hour"], utc=True)
+    cached = cache.read(NAME, VERSION, columns=["start_station_id", "hour", "rides"])
+    pd.testing.assert_frame_equal(
+        cached.sort_values(KEYS).reset_index(drop=True),
+        expected.sort_values(KEYS).reset_index(drop=True)[cached.columns],
+        check_dtype=False,
+    )
+
+
+def test_routine_upsert_syncs_incrementally(store, capsys):
+    fs, fg, cache = store
+    sync(fs, cache)
+    # New hours plus a recount of the last 48 hours, as upload_recent_to_hopsworks.py sends them
+    fg.insert(hourly("2024-03-19", 24 * 3, rides=2))
+    sync(fs, cache)
+
+    assert "♻️" not in capsys.readouterr().out
+    assert_cache_matches(fs, cache)
+
+
+def test_backfill_before_the_window_rebuilds(store, capsys):
+    fs, fg, cache = store
+    sync(fs, cache)
+    fg.insert(hourly("2024-02-01", 24 * 10))
+    sync(fs, cache)
+
+    assert "rows inserted" in capsys.readouterr().out
+    assert_cache_matches(fs, cache)
+
+
+def test_overwrite_rebuilds(store, capsys):
+    fs, fg, cache = store
+    sync(fs, cache)
+    fg.insert(hourly("2024-03-01", 24 * 20, rides=0), write_options={"write_mode": "overwrite"})
+    sync(fs, cache)
+
+    assert "deleted or overwritten" in capsys.readouterr().out
+    assert_cache_matches(fs, cache)
+
+
+def test_cache_without_a_recorded_commit_rebuilds(store, capsys):
+    fs, fg, cache = store
+    cache.sync(NAME, VERSION, lambda after: feature_store.query_features(fs, after=after, name=NAME, version=VERSION))
+    fg.insert(hourly("2024-02-01", 24))
+    sync(fs, cache)
+
+    assert "no commit recorded" in capsys.readouterr().out
+    assert_cache_matches(fs, cache)
+
+
+def test_group_without_history_syncs_incrementally(store, capsys):
+    fs, fg, cache = store
+    fetch = lambda after: feature_store.query_features(fs, after=after, name=NAME, version=VERSION)
+    cache.sync(NAME, VERSION, fetch, commits=lambda: None)
+    fg.insert(hourly("2024-03-20", 24))
+    cache.sync(NAME, VERSION, fetch, commits=lambda: None)
+
+    assert "♻️" not in capsys.readouterr().out
+    assert_cache_matches(fs, cache)
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+joblib = pytest.importorskip("joblib")
+pytest.importorskip("sklearn")
+
+from sklearn.decomposition import PCA
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+
+from src.utils import model_registry
+from src.utils.local_hopsworks import LocalModelRegistry
+from src.utils.model_cache import ModelCache
+
+NAME = "citibike_pca_JC115"
+
+
+@pytest.fixture(params=["cache", "direct"])
+def mr(request, tmp_path, monkeypatch):
+    if request.param == "cache":
+        monkeypatch.setattr(model_registry, "ModelCache", lambda: ModelCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(model_registry, "USE_MODEL_CACHE", request.param == "cache")
+    return LocalModelRegistry(str(tmp_path / "models"))
+
+
+def fitted_pca_model():
+    X = np.random.default_rng(0).normal(size=(200, 28))
+    pca = PCA(n_components=4).fit(X)
+    regressor = LinearRegression().fit(pca.transform(X), X[:, 0])
+    return X, pca, regressor
+
+
+def register(mr, tmp_path, files):
+    model_dir = tmp_path / "artifact"
+    model_dir.mkdir()
+    for file_name, obj in files.items():
+        joblib.dump(obj, model_dir / file_name)
+    model_registry.register_model(mr, NAME, str(model_dir))
+
+
+def test_loads_the_baseline_layout(mr, tmp_path):
+    # As saved by the baseline src/models/lightgbm_pca_model.py
+    X, pca, regressor = fitted_pca_model()
+    register(mr, tmp_path, {"lgbm_model.pkl": regressor, "pca_transformer.pkl": pca})
+
+    pipeline = model_registry.load_pca_pipeline(mr, NAME)
+    assert isinstance(pipeline, Pipeline)
+    np.testing.assert_allclose(pipeline.predict(X[:5]), regressor.predict(pca.transform(X[:5])))
+    assert model_registry.loaded_model_version(NAME) == 1
+
+
+def test_loads_a_pipeline(mr, tmp_path):
+    X, pca, regressor = fitted_pca_model()
+    register(mr, tmp_path, {"model.pkl": Pipeline([("pca", pca), ("model", regressor)])})
+
+    pipeline = model_registry.load_pca_pipeline(mr, NAME)
+    np.testing.assert_allclose(pipeline.predict(X[:5]), regressor.predict(pca.transform(X[:5])))
+
+
+@pytest.mark.parametrize("files", [
+    {"lgbm_model.pkl": LinearRegression()},
+    {"model.pkl": LinearRegression()},
+])
+def test_unusable_layouts_ask_for_a_retrain(mr, tmp_path, files):
+    register(mr, tmp_path, files)
+    with pytest.raises(ValueError, match="retrain the PCA model"):
+        model_registry.load_pca_pipeline(mr, NAME)
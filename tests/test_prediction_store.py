@@ -0,0 +1,78 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+from src.utils.prediction_store import bucket_rows, rollup, row_digests
+
+
+def partition(start, hours, run_id, station="5329.03"):
+    """A test-slice partition as the inference scripts write it; predictions depend only on the hour."""
+    hour = pd.date_range(start, periods=hours, freq="h", tz="UTC")
+    rides = (hour.hour.to_numpy() % 7).astype(float)
+    return pd.DataFrame({
+        "station_id": station,
+        "hour": hour,
+        "predicted_rides": rides + 0.5,
+        "actual_rides": rides,
+        "run_id": run_id,
+        "model_version": pd.array([3] * hours, dtype="Int64"),
+    })
+
+
+def changed_mask(previous, current):
+    return ~pd.Series(row_digests(current)).isin(row_digests(previous)).to_numpy()
+
+
+def test_shifted_window_only_flags_new_hours():
+    previous = partition("2024-01-01 05:00", 240, run_id="run-1")
+    current = partition("2024-01-02 05:00", 240, run_id="run-2")
+
+    changed = changed_mask(previous, current)
+    assert current.loc[changed, "hour"].min() == previous["hour"].max() + pd.Timedelta(hours=1)
+    assert changed.sum() == 24
+
+
+def test_repredicted_hour_is_flagged():
+    previous = partition("2024-01-01", 48, run_id="run-1")
+    current = previous.assign(run_id="run-2")
+    current.loc[10, "predicted_rides"] += 1.0
+    current.loc[20, "model_version"] = 4
+
+    assert np.flatnonzero(changed_mask(previous, current)).tolist() == [10, 20]
+
+
+def test_bucket_rows_rollup_matches_full_rollup():
+    previous = partition("2024-01-01 05:00", 240, run_id="run-1")
+    current = partition("2024-01-01 05:00", 262, run_id="run-2")
+    changed = changed_mask(previous, current)
+
+    partial = rollup(bucket_rows(current, changed, "daily"), "daily", complete_start=True)
+    full = rollup(current, "daily", complete_start=True)
+    # The last day of the previous run was incomplete, so it is re-aggregated with its new hours
+    assert partial["hour"].tolist() == full["hour"].tail(2).tolist()
+    pd.testing.assert_frame_equal(partial.reset_index(drop=True), full.tail(2).reset_index(drop=True))
+
+
+def test_partial_first_bucket_is_not_rolled_up():
+    current = partition("2024-01-01 05:00", 30, run_id="run-1")
+    changed = np.ones(len(current), dtype=bool)
+
+    rolled = rollup(bucket_rows(current, changed, "daily"), "daily", complete_start=True)
+    assert rolled["hour"].tolist() == [pd.Timestamp("2024-01-02", tz="UTC")]
+    assert rolled["n_hours"].tolist() == [11]
+
+
+def test_forecast_6h_rollup():
+    current = partition("2024-01-01 03:00", 15, run_id="run-1")
+    changed = np.zeros(len(current), dtype=bool)
+    changed[-1] = True
+
+    rolled = rollup(bucket_rows(current, changed, "6h"), "6h")
+    assert rolled["hour"].tolist() == [pd.Timestamp("2024-01-01 12:00", tz="UTC")]
+    assert rolled["n_hours"].tolist() == [6]
+    assert rolled["predicted_rides"].tolist() == [current["predicted_rides"].tail(6).mean()]
+
+    full = rollup(current, "6h")
+    assert full["hour"].dt.hour.tolist() == [0, 6, 12]
+    assert full["n_hours"].tolist() == [3, 6, 6]